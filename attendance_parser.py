@@ -0,0 +1,2898 @@
+import os
+import io
+import sys
+import json
+import csv
+import re
+import hashlib
+import struct
+import gzip
+import bz2
+import lzma
+import mmap
+import sqlite3
+import select
+import queue
+import threading
+import signal
+import cProfile
+import time as timer
+import importlib.util
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time
+from collections import defaultdict
+from contextlib import contextmanager
+from itertools import chain
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Tuple
+
+
+def lazy_import(name: str):
+    #The module loads on first attribute access, so runs that never touch it skip its import time; None when not installed
+    try:
+        spec = importlib.util.find_spec(name)
+    except ValueError:
+        return None
+    if spec is None:
+        return None
+    if name in sys.modules:
+        return sys.modules[name]
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+#openpyxl is imported by the Excel writers only, so --no-excel queries answered from the summary store load none of these
+np = lazy_import('numpy')
+zipfile = lazy_import('zipfile')
+tarfile = lazy_import('tarfile')
+tempfile = lazy_import('tempfile')
+concurrent_futures = lazy_import('concurrent.futures')
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+SHIFT_START_TIME = time(9,0)
+SHIFT_END_TIME = time(18,0)
+LATE_THRESHOLD = time(9,30)
+EARLY_THRESHOLD = time(17,0)
+LATE_THRESHOLD_SECONDS = LATE_THRESHOLD.hour * 3600 + LATE_THRESHOLD.minute * 60 + LATE_THRESHOLD.second
+EARLY_THRESHOLD_SECONDS = EARLY_THRESHOLD.hour * 3600 + EARLY_THRESHOLD.minute * 60 + EARLY_THRESHOLD.second
+LOG_FOLDER = 'attendance_logs'
+OUTPUT_FOLDER = 'attendance_reports'
+LOG_EXTENSIONS = ('.log', '.csv')
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+COMPRESSED_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open, '.zst': zstd.open if zstd else None}
+CHECKPOINT_FILE = 'ingest_checkpoint.json'
+SNAPSHOT_FILE = 'attendance_snapshot.bin'
+SNAPSHOT_MAGIC = b'ATTSNAP\x00'
+SNAPSHOT_VERSION = 1
+#magic, version, names length, punch count, record count, sha256 of everything after the header
+SNAPSHOT_HEADER = struct.Struct('<8sIIQQ32s')
+#Sections after the names table, each padded to 8 bytes so they can be cast in place
+SNAPSHOT_COLUMNS = [('emp', 'I', 'punches'), ('ts', 'q', 'punches'), ('dev', 'I', 'punches'),
+                    ('record_emp', 'I', 'records'), ('record_stamp', 'd', 'records'), ('record_dev', 'I', 'records')]
+SUMMARY_DB_FILE = 'attendance_summery.db'
+SHARD_FOLDER = 'shards'
+SHARD_MANIFEST = 'manifest.json'
+FOLLOW_POLL_INTERVAL = 0.25
+FOLLOW_FLUSH_INTERVAL = 0.5
+FOLLOW_STATE_INTERVAL = 300
+INOTIFY_EVENTS = 0x2 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200
+METRICS_FILE = 'metrics.json'
+PIPELINE_STAGES = ['read', 'summary', 'rollup', 'save_json', 'save_excel', 'save_shards', 'save_rollups', 'save_store', 'save_error_log', 'search']
+
+#Row outcomes counted by process_lines/process_row: accepted, deduplicated and rejected_<rule>
+ERROR_RECORDS_FILE = 'error_records.csv'
+ERROR_SAMPLE_LIMIT = 20
+ERROR_MESSAGES = {
+    'folder_missing': "Error folder '{file}' does not exist.",
+    'no_log_files': "No log files found in '{file}'.",
+    'file_error': "Error processing file '{file}': {detail}",
+    'insufficient_columns': "Row {row} in file '{file}' has insufficient columns.",
+    'missing_fields': "Row {row} in file '{file}' is missing required fields.",
+    'emp_code': "Row {row} in file '{file}'emp_code must be alphanumeric.",
+    'first_name': "Row {row} in file '{file}' first_name must contain character.",
+    'last_name': "Row {row} in file '{file}' last_name must contain character.",
+    'timestamp_format': "Row {row} in file '{file}' timestamp format is invalid.",
+    'device': "Row {row} in file '{file}' device format is invalid or missing.",
+    'invalid_timestamp': "Row {row} in file '{file}' has an invalid timestamp.",
+    'row_error': "Error processing row {row} in file '{file}': {detail}"
+}
+QUERY_FIELDS = {
+    'employee': ['emp_code'],
+    'date': ['date'],
+    'employee_and_date': ['emp_code', 'date'],
+    'date_range': ['emp_code', 'start_date', 'end_date']
+}
+#PackedRecordSet layout, low bits first: epoch + bias, device id, then the emp id in the remaining high bits
+PACKED_STAMP_BITS = 40
+PACKED_STAMP_BIAS = 1 << 39
+PACKED_DEVICE_BITS = 20
+PACKED_STAMP_LIMIT = 1 << PACKED_STAMP_BITS
+PACKED_DEVICE_LIMIT = 1 << PACKED_DEVICE_BITS
+DISK_DEDUP_CACHE_KIB = 64 * 1024
+ROLLUP_PERIODS = ['week', 'month']
+ROLLUP_ANCHOR = date(1970, 1, 5)
+ROLLUP_PERIOD_PATTERN = re.compile(r'(\d+)d(?:@(\d{4}-\d{2}-\d{2}))?')
+ROLLUP_FIELDS = ['days', 'total_punches', 'worked_minutes', 'late_entries', 'early_exits', 'single_punches']
+ROLLUP_COLUMNS = ['total_punches', 'work_minutes', 'late_entry', 'early_exit', 'single_punch']
+ROLLUP_HEADER = ['Type', 'Period', 'Start', 'End', 'Emp Code', 'Days', 'Total Punches', 'Worked Minutes', 'Worked Hours', 'Late Entries', 'Early Exits', 'Single Punches']
+SUMMARY_FIELDS = ['emp_code', 'first_punch', 'last_punch', 'total_punches', 'working_hours', 'late_entry', 'early_exit', 'single_punch']
+FINGERPRINT_BLOCK = 64 * 1024
+PARALLEL_CHUNK_BYTES = 16 * 1024 * 1024
+LOG_WINDOW_BYTES = 1024 * 1024
+#Bytes whose text reading differs from a byte split: newline translation, str-only whitespace (\x1c-\x1f) and UTF-8
+LOG_TEXT_ONLY_BYTES = re.compile(rb'[\r\x1c-\x1f\x80-\xff]')
+PIPELINE_FILE_BYTES = 16 * 1024 * 1024
+PIPELINE_QUEUE_FILES = 4
+TIMESTAMP_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%d-%m-%Y %H:%M:%S',
+    '%d-%m-%Y %H:%M',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%Y/%m/%d %H:%M:%S',
+    '%Y/%m/%d %H:%M'
+]
+TIMESTAMP_DETECT_ROWS = 3
+EPOCH_CACHE_SIZE = 65536
+EPOCH_CACHE_PROBE = 4096
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+SECONDS_PER_DAY = 86400
+EXCEL_HEADER = ['Date', 'Emp Code', 'First Punch', 'Last Punch', 'Total Punches', 'Working Hours', 'Late Entry', 'Early Exit', 'Single Punch']
+EXCEL_MAX_COLUMN_WIDTH = 20
+
+
+def to_local_seconds(dt: datetime) -> int:
+    return (dt.toordinal() - EPOCH_ORDINAL) * SECONDS_PER_DAY + dt.hour * 3600 + dt.minute * 60 + dt.second
+
+
+def day_to_date_key(day: int) -> str:
+    return date.fromordinal(EPOCH_ORDINAL + day).isoformat()
+
+
+CLOCK_LABELS = [f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(SECONDS_PER_DAY // 60)]
+
+
+def format_clock(seconds: int) -> str:
+    return CLOCK_LABELS[(seconds % SECONDS_PER_DAY) // 60]
+
+
+def array_from_numpy(typecode: str, values) -> array:
+    column = array(typecode)
+    column.frombytes(values.astype(typecode).tobytes())
+    return column
+
+
+def copy_column(typecode: str, values) -> array:
+    #values is an array or a read-only view of a mapped snapshot
+    column = array(typecode)
+    column.frombytes(memoryview(values).cast('B'))
+    return column
+
+
+class PunchStore:
+    #Punches are kept as wall-clock seconds since 1970-01-01, one column per field
+    def __init__(self):
+        self.employees = []
+        self.employee_index = {}
+        self.devices = []
+        self.device_index = {}
+        self.emp = array('I')
+        self.ts = array('q')
+        self.dev = array('I')
+        self.is_sorted = True
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def __contains__(self, emp_code: str) -> bool:
+        return emp_code in self.employee_index
+
+    def intern_employee(self, emp_code: str) -> int:
+        emp_id = self.employee_index.get(emp_code)
+        if emp_id is None:
+            emp_id = self.employee_index[emp_code] = len(self.employees)
+            self.employees.append(emp_code)
+        return emp_id
+
+    def intern_device(self, device: str) -> int:
+        device_id = self.device_index.get(device)
+        if device_id is None:
+            device_id = self.device_index[device] = len(self.devices)
+            self.devices.append(device)
+        return device_id
+
+    def append(self, emp_code: str, dt: datetime, device: str) -> None:
+        self.emp.append(self.intern_employee(emp_code))
+        self.ts.append(to_local_seconds(dt))
+        self.dev.append(self.intern_device(device))
+        self.is_sorted = False
+
+    def extend(self, other: 'PunchStore', skip: set = None) -> None:
+        #skip holds row numbers of other
+        emp_map = [self.intern_employee(emp_code) for emp_code in other.employees]
+        device_map = [self.intern_device(device) for device in other.devices]
+        for row, (emp_id, seconds, device_id) in enumerate(zip(other.emp, other.ts, other.dev)):
+            if skip and row in skip:
+                continue
+            self.emp.append(emp_map[emp_id])
+            self.ts.append(seconds)
+            self.dev.append(device_map[device_id])
+        self.is_sorted = self.is_sorted and not other.ts
+
+    def copy(self) -> 'PunchStore':
+        other = PunchStore()
+        other.employees, other.employee_index = list(self.employees), dict(self.employee_index)
+        other.devices, other.device_index = list(self.devices), dict(self.device_index)
+        other.emp, other.ts, other.dev = copy_column('I', self.emp), copy_column('q', self.ts), copy_column('I', self.dev)
+        other.is_sorted = self.is_sorted
+        return other
+
+    def make_writable(self) -> None:
+        #Stores loaded from a snapshot read their columns straight from the mapped file until punches are added
+        if not isinstance(self.ts, array):
+            self.emp, self.ts, self.dev = copy_column('I', self.emp), copy_column('q', self.ts), copy_column('I', self.dev)
+
+    def sort(self) -> None:
+        #Sort by (emp_code, ts) and renumber employees so emp ids follow emp_code order
+        if self.is_sorted:
+            return
+
+        rank = [0] * len(self.employees)
+        for new_id, emp_id in enumerate(sorted(range(len(self.employees)), key=self.employees.__getitem__)):
+            rank[emp_id] = new_id
+
+        if self.ts and np is not None:
+            emp = np.array(rank, dtype='I')[np.frombuffer(self.emp, dtype='I')]
+            ts = np.frombuffer(self.ts, dtype='q')
+            order = np.lexsort((ts, emp))
+            self.emp = array_from_numpy('I', emp[order])
+            self.ts = array_from_numpy('q', ts[order])
+            self.dev = array_from_numpy('I', np.frombuffer(self.dev, dtype='I')[order])
+        elif self.ts:
+            low = min(self.ts)
+            span = max(self.ts) - low + 1
+            device_count = len(self.devices)
+            keys = sorted((rank[emp_id] * span + seconds - low) * device_count + device_id
+                          for emp_id, seconds, device_id in zip(self.emp, self.ts, self.dev))
+
+            emp, ts, dev = array('I'), array('q'), array('I')
+            for key in keys:
+                rest, device_id = divmod(key, device_count)
+                emp_id, offset = divmod(rest, span)
+                emp.append(emp_id)
+                ts.append(offset + low)
+                dev.append(device_id)
+            self.emp, self.ts, self.dev = emp, ts, dev
+
+        self.employees = sorted(self.employees)
+        self.employee_index = {emp_code: emp_id for emp_id, emp_code in enumerate(self.employees)}
+        self.is_sorted = True
+
+    def employee_range(self, emp_code: str) -> Tuple[int, int]:
+        self.sort()
+        emp_id = self.employee_index.get(emp_code)
+        if emp_id is None:
+            return 0, 0
+        return bisect_left(self.emp, emp_id), bisect_right(self.emp, emp_id)
+
+    def day_groups(self, start: int = 0, end: int = None):
+        #Yields (emp_id, day, start, end) for every (employee, day) group in sorted order
+        self.sort()
+        emp, ts = self.emp, self.ts
+        end = len(ts) if end is None else end
+        while start < end:
+            emp_id = emp[start]
+            emp_end = bisect_right(emp, emp_id, start, end)
+            while start < emp_end:
+                day = ts[start] // SECONDS_PER_DAY
+                group_end = bisect_left(ts, (day + 1) * SECONDS_PER_DAY, start, emp_end)
+                yield emp_id, day, start, group_end
+                start = group_end
+
+
+class ErrorLog:
+    #Error records go straight to a CSV spool as (file id, row, code, detail); memory keeps per-file/per-code counts and a few samples per code
+    def __init__(self, spool_path: str = None, sample_limit: int = ERROR_SAMPLE_LIMIT):
+        self.files = []
+        self.file_ids = {}
+        self.counts = defaultdict(int)
+        self.samples = defaultdict(list)
+        self.sample_limit = sample_limit
+        self.total = 0
+        #Row outcomes of the reads that used this log: accepted, deduplicated, rejected_<code> and file_errors
+        self.row_stats = defaultdict(int)
+        self.spool_path = spool_path
+        self.spool = None
+        self.writer = None
+        if spool_path is not None:
+            directory = os.path.dirname(spool_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.spool = open(spool_path, 'w', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.spool)
+
+    def __len__(self) -> int:
+        return self.total
+
+    def file_id(self, filepath: str) -> int:
+        file_id = self.file_ids.get(filepath)
+        if file_id is None:
+            file_id = self.file_ids[filepath] = len(self.files)
+            self.files.append(filepath)
+        return file_id
+
+    def add(self, code: str, filepath: str, row: int = None, detail: str = '') -> None:
+        file_id = self.file_id(filepath)
+        self.counts[(file_id, code)] += 1
+        self.total += 1
+        samples = self.samples[code]
+        if len(samples) < self.sample_limit:
+            samples.append((file_id, row, detail))
+        if self.writer is not None:
+            self.writer.writerow((file_id, '' if row is None else row, code, detail))
+
+    def merge(self, other: 'ErrorLog') -> None:
+        file_ids = [self.file_id(filepath) for filepath in other.files]
+        for (file_id, code), count in other.counts.items():
+            self.counts[(file_ids[file_id], code)] += count
+        for code, samples in other.samples.items():
+            kept = self.samples[code]
+            kept.extend((file_ids[file_id], row, detail) for file_id, row, detail in samples[:max(self.sample_limit - len(kept), 0)])
+        self.total += other.total
+        for name, count in other.row_stats.items():
+            self.row_stats[name] += count
+
+        if other.spool_path is not None:
+            with open(other.spool_path, 'r', newline='', encoding='utf-8') as f:
+                for file_id, row, code, detail in csv.reader(f):
+                    if self.writer is not None:
+                        self.writer.writerow((file_ids[int(file_id)], row, code, detail))
+            os.remove(other.spool_path)
+
+    def message(self, code: str, file_id: int, row: int, detail: str) -> str:
+        return ERROR_MESSAGES[code].format(file=self.files[file_id], row=row, detail=detail)
+
+    def flush(self) -> None:
+        if self.spool is not None:
+            self.spool.flush()
+
+    def close(self) -> None:
+        if self.spool is not None:
+            self.spool.close()
+            self.spool = None
+            self.writer = None
+
+    def discard(self) -> None:
+        self.close()
+        if self.spool_path is not None and os.path.exists(self.spool_path):
+            os.remove(self.spool_path)
+
+def worker_error_log(sample_limit: int) -> ErrorLog:
+    #Workers spool to a private temp file that merge() folds into the main spool in file order
+    fd, spool_path = tempfile.mkstemp(prefix='attendance_errors_', suffix='.csv')
+    os.close(fd)
+    return ErrorLog(spool_path, sample_limit)
+
+
+def read_log_files(log_folder: str, workers: int = 1, error_log: ErrorLog = None, dedup: str = 'set', pipeline: bool = False) -> Tuple[PunchStore, ErrorLog, set]:
+    attendance_date = PunchStore()
+    if error_log is None:
+        error_log = ErrorLog()
+    processed_records = DEDUP_ENGINES[dedup]()
+
+    if not os.path.exists(log_folder):
+        error_log.add('folder_missing', log_folder)
+        return attendance_date, error_log, processed_records
+
+    files = [f for f in os.listdir(log_folder) if is_log_file(f)]
+
+    if not files:
+        error_log.add('no_log_files', log_folder)
+        return attendance_date, error_log, processed_records
+
+    filepaths = [os.path.join(log_folder, file) for file in files]
+    if workers > 1:
+        process_files_parallel(filepaths, workers, attendance_date, error_log, processed_records)
+    elif pipeline:
+        process_files_pipelined(filepaths, attendance_date, error_log, processed_records)
+    else:
+        for filepath in filepaths:
+            process_file(filepath, attendance_date, error_log, processed_records)
+
+    if isinstance(processed_records, DeferredRecords):
+        processed_records = unique_punches(attendance_date, processed_records, error_log)
+    return attendance_date, error_log, processed_records
+
+
+def process_files_parallel(filepaths: List[str], workers: int, attendance_data: PunchStore, error_log: ErrorLog, processed_records: set, chunk_bytes: int = PARALLEL_CHUNK_BYTES) -> None:
+    #Workers dedup with a set that remembers punch order, except under the sort engine where every punch waits for the final pass
+    dedup = 'sort' if isinstance(processed_records, DeferredRecords) else 'ordered'
+    with concurrent_futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        tasks = []
+        for filepath in filepaths:
+            ranges = split_log_file(filepath, chunk_bytes)
+            if ranges:
+                futures = [executor.submit(parse_range_task, filepath, start, end, reader, error_log.sample_limit, dedup) for start, end, reader in ranges]
+            else:
+                futures = [executor.submit(parse_file_task, filepath, error_log.sample_limit, dedup)]
+            tasks.append((filepath, futures))
+
+        #Merge in file and chunk order so the result matches the serial path
+        for filepath, futures in tasks:
+            try:
+                partials = [future.result() for future in futures]
+            except Exception:
+                #A chunk hit a file-level error; the serial reader reports it exactly as before
+                for future in futures:
+                    if future.exception() is None:
+                        future.result()[2].discard()
+                process_file(filepath, attendance_data, error_log, processed_records)
+                continue
+
+            for partial in partials:
+                merge_partial(partial, attendance_data, error_log, processed_records)
+
+
+def process_files_pipelined(filepaths: List[str], attendance_data: PunchStore, error_log: ErrorLog, processed_records: set) -> None:
+    #A reader thread loads the next files while this one parses; the bounded queue holds it back when parsing lags
+    loaded = queue.Queue(maxsize=PIPELINE_QUEUE_FILES)
+    stop = threading.Event()
+    reader = threading.Thread(target=prefetch_files, args=(filepaths, loaded, stop), daemon=True)
+    reader.start()
+    try:
+        for _ in filepaths:
+            filepath, data = loaded.get()
+            process_file(filepath, attendance_data, error_log, processed_records, data)
+    finally:
+        stop.set()
+        reader.join()
+
+
+def prefetch_files(filepaths: List[str], loaded: queue.Queue, stop: threading.Event) -> None:
+    for filepath in filepaths:
+        #Large or unreadable files are handed over as None; process_file reads them from disk and reports errors as usual
+        data = None
+        try:
+            if os.path.getsize(filepath) <= PIPELINE_FILE_BYTES:
+                with open(filepath, 'rb') as f:
+                    data = f.read()
+        except OSError:
+            data = None
+
+        while not stop.is_set():
+            try:
+                loaded.put((filepath, data), timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        if stop.is_set():
+            return
+
+
+def split_log_file(filepath: str, chunk_bytes: int) -> List[Tuple[int, int, Dict]]:
+    try:
+        size = os.path.getsize(filepath)
+        if not filepath.endswith('.log') or size <= chunk_bytes:
+            return []
+
+        with open(filepath, 'rb') as f:
+            first_line = f.readline().decode('utf-8').strip()
+            reader = new_reader_state(first_line)
+            if reader['format'] != 'log':
+                return []
+
+            ranges = []
+            start = 0
+            row_num = 1
+            while start < size:
+                if start + chunk_bytes >= size:
+                    end = size
+                else:
+                    f.seek(start + chunk_bytes - 1)
+                    f.readline()
+                    end = f.tell()
+
+                f.seek(start)
+                data = f.read(end - start)
+                #Bare carriage returns are line breaks in text mode, leave such files to a single worker
+                if b'\r' in data:
+                    return []
+
+                ranges.append((start, end, dict(reader, row_num=row_num)))
+                row_num += data.count(b'\n')
+                start = end
+            return ranges
+
+    except Exception:
+        return []
+
+
+def parse_file_task(filepath: str, sample_limit: int = ERROR_SAMPLE_LIMIT, dedup: str = 'ordered') -> Tuple[PunchStore, set, ErrorLog]:
+    attendance_data = PunchStore()
+    error_log = worker_error_log(sample_limit)
+    processed_records = WORKER_DEDUP_ENGINES[dedup]()
+    process_file(filepath, attendance_data, error_log, processed_records)
+    error_log.close()
+    return attendance_data, processed_records, error_log
+
+
+def parse_range_task(filepath: str, start: int, end: int, reader: Dict, sample_limit: int = ERROR_SAMPLE_LIMIT, dedup: str = 'ordered') -> Tuple[PunchStore, set, ErrorLog]:
+    attendance_data = PunchStore()
+    error_log = worker_error_log(sample_limit)
+    processed_records = WORKER_DEDUP_ENGINES[dedup]()
+    try:
+        with open(filepath, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+        if not process_log_bytes(data, filepath, attendance_data, error_log, processed_records, reader):
+            process_lines(io.StringIO(data.decode('utf-8'), newline=None), reader, filepath, attendance_data, error_log, processed_records)
+    except Exception:
+        error_log.discard()
+        raise
+    error_log.close()
+    return attendance_data, processed_records, error_log
+
+
+def merge_partial(partial: Tuple[PunchStore, set, ErrorLog], attendance_data: PunchStore, error_log: ErrorLog, processed_records: set) -> None:
+    partial_data, partial_records, partial_errors = partial
+
+    #Punches already seen in an earlier file or chunk were dropped by the serial path
+    overlap = processed_records.intersection(partial_records)
+    error_log.row_stats['accepted'] -= len(overlap)
+    error_log.row_stats['deduplicated'] += len(overlap)
+    skip = None
+    if overlap:
+        #The stamps the worker kept in punch order tie every row to its record; wall-clock times cannot,
+        #an ISO time inside a DST gap has the stamp of the hour after it
+        records = zip(map(partial_data.employees.__getitem__, partial_data.emp), partial_records.stamps, map(partial_data.devices.__getitem__, partial_data.dev))
+        skip = {row for row, record_id in enumerate(records) if record_id in overlap}
+    attendance_data.extend(partial_data, skip)
+
+    processed_records.update(partial_records)
+    error_log.merge(partial_errors)
+
+
+def process_file(filepath:str, attendance_data: PunchStore, error_log: ErrorLog, processed_records: set, data: bytes = None) -> None:
+    #data holds the file's bytes when the pipelined reader has already loaded them
+    try:
+        if filepath.endswith('.log') and process_log_file(filepath, attendance_data, error_log, processed_records, data):
+            return
+
+        for source, f in open_log_sources(filepath, data):
+            with f:
+                first_line = f.readline()
+                reader = new_reader_state(first_line.strip())
+                process_lines(chain((first_line,), f), reader, source, attendance_data, error_log, processed_records)
+
+    except Exception as e:
+        error_log.add('file_error', filepath, detail=str(e))
+        error_log.row_stats['file_errors'] += 1
+
+
+def is_log_file(name: str) -> bool:
+    if name.endswith(ARCHIVE_EXTENSIONS):
+        return True
+    base, extension = os.path.splitext(name)
+    if extension in COMPRESSED_OPENERS:
+        name = base
+    return name.endswith(LOG_EXTENSIONS)
+
+
+def open_log_sources(filepath: str, data: bytes = None):
+    #Yields (name, text stream) per log; compressed files and archive members are decoded while they are read
+    source = filepath if data is None else io.BytesIO(data)
+    if filepath.endswith(LOG_EXTENSIONS):
+        yield filepath, open(filepath, 'r', encoding='utf-8') if data is None else io.TextIOWrapper(source, encoding='utf-8')
+    elif filepath.endswith('.zip'):
+        with zipfile.ZipFile(source) as archive:
+            for member in archive.infolist():
+                if not member.is_dir() and is_archive_member(member.filename):
+                    yield os.path.join(filepath, member.filename), decode_stream(archive.open(member), member.filename)
+    elif filepath.endswith(ARCHIVE_EXTENSIONS):
+        #Stream mode reads the members in order without seeking back through the compressed data
+        with tarfile.open(fileobj=source, mode='r|*') if data is not None else tarfile.open(filepath, 'r|*') as archive:
+            for member in archive:
+                if member.isfile() and is_archive_member(member.name):
+                    yield os.path.join(filepath, member.name), decode_stream(io.BufferedReader(TarMemberReader(archive.extractfile(member))), member.name)
+    else:
+        yield filepath, decode_stream(source, filepath)
+
+
+class TarMemberReader(io.RawIOBase):
+    #Members of a streamed tar cannot answer seekable(), which TextIOWrapper asks on creation
+    def __init__(self, member):
+        self.member = member
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        return self.member.readinto(buffer)
+
+
+def is_archive_member(name: str) -> bool:
+    return is_log_file(name) and not name.endswith(ARCHIVE_EXTENSIONS)
+
+
+def decode_stream(source, name: str) -> io.TextIOWrapper:
+    #source is a compressed file's path or a binary stream of it or of an archive member
+    extension = os.path.splitext(name)[1]
+    if extension in COMPRESSED_OPENERS:
+        opener = COMPRESSED_OPENERS[extension]
+        if opener is None:
+            raise ValueError(f"reading '{extension}' files requires the zstandard package")
+        source = opener(source, 'rb')
+    return io.TextIOWrapper(source, encoding='utf-8')
+
+
+def new_reader_state(first_line: str) -> Dict:
+    if ',' in first_line:
+        return {'format': 'csv', 'fieldnames': None, 'row_num': 2}
+
+    first_line_values = first_line.split()
+    is_header = first_line_values[0] in ['emp_code', 'employee_code', 'code']
+    return {'format': 'log', 'is_header': is_header, 'row_num': 1}
+
+
+def process_lines(lines, reader: Dict, filepath: str, attendance_data: PunchStore, error_log: ErrorLog, processed_records: set, timestamp_parser: 'TimestampParser' = None) -> None:
+    timestamp_parser = timestamp_parser or TimestampParser()
+    if reader['format'] == 'csv':
+        render = csv.DictReader(lines, fieldnames=reader['fieldnames'])
+        for row in render:
+            process_row(row, filepath, reader['row_num'], attendance_data, error_log, processed_records, timestamp_parser)
+            reader['row_num'] += 1
+        reader['fieldnames'] = render.fieldnames
+        return
+
+    is_header = reader['is_header']
+    row_num = reader['row_num']
+    for line in lines:
+        row_num += 1
+        line = line.strip()
+
+        if not line or line.startswith('#'):
+            continue
+
+        if row_num == 2 and is_header:
+            continue
+
+        values = line.split()
+        if len(values) < 6:
+            error_log.add('insufficient_columns', filepath, row_num - 1)
+            error_log.row_stats['rejected_insufficient_columns'] += 1
+            continue
+
+        row = {
+            'emp_code': values[0],
+            'first_name': values[1],
+            'last_name': values[2],
+            'timestamp': values[3],
+            'device': ' '.join(values[4:])
+        }
+        process_row(row, filepath, row_num, attendance_data, error_log, processed_records, timestamp_parser)
+    reader['row_num'] = row_num
+
+
+def process_log_file(filepath: str, attendance_data: PunchStore, error_log: ErrorLog, processed_records: set, data: bytes = None) -> bool:
+    #Whitespace .log files are read as bytes from a map of the file; False leaves the file to the text reader
+    if data is not None:
+        return process_log_bytes(data, filepath, attendance_data, error_log, processed_records)
+
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return False
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return process_log_bytes(mm, filepath, attendance_data, error_log, processed_records)
+
+
+def process_log_bytes(data, filepath: str, attendance_data: PunchStore, error_log: ErrorLog, processed_records: set, reader: Dict = None) -> bool:
+    #Rows with an epoch timestamp that pass process_row's checks on their bytes are added without a row dict or datetime;
+    #fromtimestamp(epoch).timestamp() == epoch, so the epoch is their record stamp. Every other line goes through
+    #process_lines in file order, which keeps dedup, row numbers and error output as the text reader has them.
+    if not data or LOG_TEXT_ONLY_BYTES.search(data):
+        return False
+
+    if reader is None:
+        first_line_end = data.find(b'\n')
+        reader = new_reader_state(data[:first_line_end if first_line_end >= 0 else len(data)].decode('utf-8').strip())
+    if reader['format'] != 'log':
+        return False
+
+    timestamp_parser = TimestampParser()
+    #Raw field bytes -> decoded name, None for bytes that fail the checks; UTC offsets by hour since 1970
+    employees, devices, offsets = {}, {}, {}
+    employee_index, device_index = attendance_data.employee_index, attendance_data.device_index
+    emp_column, ts_column, dev_column = attendance_data.emp, attendance_data.ts, attendance_data.dev
+    #Fast rows are added to reader['row_num'] whenever process_lines needs it
+    fast_rows = accepted = deduplicated = 0
+    #The header is always the first line of the file, range tasks start further down
+    skip_header = reader['is_header'] and reader['row_num'] == 1
+    pending = []
+
+    for lines in log_windows(data):
+        for line in lines:
+            #The device is the rest of the line, it needs two words like the text reader's sixth column
+            values = line.split(None, 4)
+            emp_code = device = None
+            if len(values) == 5 and not skip_header and values[3].isdigit() and len(values[3]) <= 11 and values[1].isalpha() and values[2].isalpha():
+                emp_code = employees.get(values[0], False)
+                if emp_code is False:
+                    emp_code = employees[values[0]] = values[0].decode('ascii') if values[0].isalnum() else None
+                device = devices.get(values[4], False)
+                if device is False:
+                    words = values[4].split()
+                    device = devices[values[4]] = b' '.join(words).decode('ascii') if len(words) > 1 else None
+
+            if emp_code is None or device is None:
+                skip_header = False
+                pending.append(line)
+                continue
+
+            if pending:
+                reader['row_num'] += fast_rows
+                fast_rows = 0
+                process_lines([pending_line.decode('utf-8') for pending_line in pending], reader, filepath, attendance_data, error_log, processed_records, timestamp_parser)
+                pending = []
+            fast_rows += 1
+
+            epoch = int(values[3])
+            record_id = (emp_code, float(epoch), device)
+            if record_id in processed_records:
+                deduplicated += 1
+                continue
+
+            processed_records.add(record_id)
+            hour = epoch // 3600
+            offset = offsets.get(hour, False)
+            if offset is False:
+                offset = offsets[hour] = hour_offset(hour)
+            emp_id = employee_index.get(emp_code)
+            device_id = device_index.get(device)
+            emp_column.append(attendance_data.intern_employee(emp_code) if emp_id is None else emp_id)
+            ts_column.append(epoch + (timer.localtime(epoch).tm_gmtoff if offset is None else offset))
+            dev_column.append(attendance_data.intern_device(device) if device_id is None else device_id)
+            accepted += 1
+
+    reader['row_num'] += fast_rows
+    if pending:
+        process_lines([pending_line.decode('utf-8') for pending_line in pending], reader, filepath, attendance_data, error_log, processed_records, timestamp_parser)
+    if accepted:
+        attendance_data.is_sorted = False
+    error_log.row_stats['accepted'] += accepted
+    error_log.row_stats['deduplicated'] += deduplicated
+    return True
+
+
+def hour_offset(hour: int) -> int:
+    #UTC offset of a whole hour, None when a DST change falls inside it
+    offset = timer.localtime(hour * 3600).tm_gmtoff
+    return offset if timer.localtime(hour * 3600 + 3599).tm_gmtoff == offset else None
+
+
+def log_windows(data) -> Iterable[List[bytes]]:
+    #Lines of about LOG_WINDOW_BYTES at a time, so a mapped file is never copied whole
+    start, size = 0, len(data)
+    while start < size:
+        end = data.find(b'\n', min(start + LOG_WINDOW_BYTES, size) - 1) + 1 or size
+        lines = data[start:end].split(b'\n')
+        if not lines[-1]:
+            lines.pop()
+        yield lines
+        start = end
+
+
+def read_log_files_incremental(log_folder: str, state_folder: str = OUTPUT_FOLDER, error_log: ErrorLog = None) -> Tuple[PunchStore, ErrorLog, set]:
+    attendance_data, processed_records, checkpoints = load_ingest_state(state_folder)
+    if error_log is None:
+        error_log = ErrorLog()
+
+    if not os.path.exists(log_folder):
+        error_log.add('folder_missing', log_folder)
+        return attendance_data, error_log, processed_records
+
+    files = [f for f in os.listdir(log_folder) if is_log_file(f)]
+
+    if not files:
+        error_log.add('no_log_files', log_folder)
+        return attendance_data, error_log, processed_records
+
+    checkpoints = ingest_new_lines(log_folder, files, checkpoints, attendance_data, error_log, processed_records)
+    save_ingest_state(attendance_data, processed_records, checkpoints, state_folder)
+    return attendance_data, error_log, processed_records
+
+
+def ingest_new_lines(log_folder: str, files: List[str], checkpoints: Dict, attendance_data: PunchStore, error_log: ErrorLog, processed_records: set) -> Dict:
+    new_checkpoints = {}
+    for file in files:
+        filepath = os.path.join(log_folder, file)
+        checkpoint = process_file_incremental(filepath, checkpoints.get(filepath), attendance_data, error_log, processed_records)
+        if checkpoint:
+            new_checkpoints[filepath] = checkpoint
+    return new_checkpoints
+
+
+def process_file_incremental(filepath: str, previous: Dict, attendance_data: PunchStore, error_log: ErrorLog, processed_records: set) -> Dict:
+    try:
+        stat = os.stat(filepath)
+        if not filepath.endswith(LOG_EXTENSIONS):
+            #Compressed files and archives have no line offsets; a changed one is read again and dedup drops the punches already seen
+            if previous and previous['inode'] == stat.st_ino and previous['size'] == stat.st_size and previous['mtime'] == stat.st_mtime_ns:
+                return previous
+            attendance_data.make_writable()
+            process_file(filepath, attendance_data, error_log, processed_records)
+            return {'inode': stat.st_ino, 'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'offset': stat.st_size, 'fingerprint': None, 'reader': None}
+
+        with open(filepath, 'rb') as f:
+            if previous and previous['inode'] == stat.st_ino and previous['size'] == stat.st_size and previous['mtime'] == stat.st_mtime_ns:
+                return previous
+
+            #Rotated or truncated files are re-read from the start
+            if previous and previous['inode'] == stat.st_ino and stat.st_size >= previous['offset'] \
+                    and prefix_fingerprint(f, previous['offset']) == previous['fingerprint']:
+                checkpoint = dict(previous, reader=dict(previous['reader']) if previous['reader'] else None)
+            else:
+                checkpoint = {'offset': 0, 'reader': None}
+
+            if checkpoint['reader'] is None:
+                f.seek(0)
+                first_line = f.readline()
+                if first_line.endswith(b'\n'):
+                    checkpoint['reader'] = new_reader_state(first_line.decode('utf-8').strip())
+
+            if checkpoint['reader'] is not None:
+                attendance_data.make_writable()
+                f.seek(checkpoint['offset'])
+                process_lines(iter_complete_lines(f, checkpoint), checkpoint['reader'], filepath, attendance_data, error_log, processed_records)
+
+            checkpoint.update(
+                inode=stat.st_ino,
+                size=stat.st_size,
+                mtime=stat.st_mtime_ns,
+                fingerprint=prefix_fingerprint(f, checkpoint['offset'])
+            )
+            return checkpoint
+
+    except Exception as e:
+        error_log.add('file_error', filepath, detail=str(e))
+        error_log.row_stats['file_errors'] += 1
+        return previous
+
+
+def iter_complete_lines(f, checkpoint: Dict):
+    #A trailing line without a newline may still be written to, leave it for the next run
+    for raw_line in f:
+        if not raw_line.endswith(b'\n'):
+            break
+        checkpoint['offset'] += len(raw_line)
+        yield raw_line.decode('utf-8')
+
+
+def prefix_fingerprint(f, length: int) -> str:
+    digest = hashlib.sha256(str(length).encode())
+    f.seek(0)
+    digest.update(f.read(min(length, FINGERPRINT_BLOCK)))
+    if length > FINGERPRINT_BLOCK:
+        tail_start = max(FINGERPRINT_BLOCK, length - FINGERPRINT_BLOCK)
+        f.seek(tail_start)
+        digest.update(f.read(length - tail_start))
+    return digest.hexdigest()
+
+
+def load_ingest_state(state_folder: str = OUTPUT_FOLDER) -> Tuple[PunchStore, set, Dict]:
+    attendance_data = PunchStore()
+    processed_records = set()
+    checkpoints = {}
+
+    snapshot_path = os.path.join(state_folder, SNAPSHOT_FILE)
+    checkpoint_path = os.path.join(state_folder, CHECKPOINT_FILE)
+    if not os.path.exists(snapshot_path):
+        return attendance_data, processed_records, checkpoints
+
+    try:
+        attendance_data, processed_records = load_snapshot(snapshot_path)
+    except ValueError as e:
+        #Checkpoints without the punches they describe would skip those lines, so everything is read again
+        print(f"Error: {e}. Re-reading all logs.")
+        return PunchStore(), set(), checkpoints
+
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoints = json.load(f)
+
+    return attendance_data, processed_records, checkpoints
+
+
+def save_ingest_state(attendance_data: PunchStore, processed_records: set, checkpoints: Dict, state_folder: str = OUTPUT_FOLDER) -> None:
+    os.makedirs(state_folder, exist_ok=True)
+
+    #State goes first: a crash before the checkpoint is written only means re-reading lines that dedup will drop
+    save_snapshot(attendance_data, processed_records, os.path.join(state_folder, SNAPSHOT_FILE))
+    write_atomic(os.path.join(state_folder, CHECKPOINT_FILE), json.dumps(checkpoints, indent=4).encode('utf-8'))
+
+
+def save_snapshot(attendance_data: PunchStore, processed_records: set, filepath: str) -> None:
+    #Header, JSON table of employee and device names, sorted punch columns, then the dedup records as id columns
+    if not attendance_data.is_sorted:
+        attendance_data = attendance_data.copy()
+        attendance_data.sort()
+    record_emp, record_stamp, record_dev = record_columns(processed_records, attendance_data)
+    columns = {
+        'emp': attendance_data.emp, 'ts': attendance_data.ts, 'dev': attendance_data.dev,
+        'record_emp': record_emp, 'record_stamp': record_stamp, 'record_dev': record_dev
+    }
+
+    names = json.dumps([attendance_data.employees, attendance_data.devices]).encode('utf-8')
+    chunks = [names, bytes(-len(names) % 8)]
+    for name, _, _ in SNAPSHOT_COLUMNS:
+        data = memoryview(columns[name]).cast('B')
+        chunks += [data, bytes(-len(data) % 8)]
+
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(names), len(attendance_data), len(record_stamp), digest.digest())
+    write_atomic(filepath, b''.join([header] + chunks))
+
+
+def record_columns(processed_records: set, attendance_data: PunchStore) -> Tuple[array, array, array]:
+    #(emp id, stamp, device id) columns sorted the way SortedRecords searches them; ids follow attendance_data
+    employee_index, device_index = attendance_data.employee_index, attendance_data.device_index
+    added = processed_records.added if isinstance(processed_records, SortedRecords) else processed_records
+    emp = array('I', [employee_index[emp_code] for emp_code, _, _ in added])
+    stamp = array('d', [stamp for _, stamp, _ in added])
+    dev = array('I', [device_index[device] for _, _, device in added])
+
+    if isinstance(processed_records, SortedRecords):
+        base = processed_records
+        emp_map = [employee_index[emp_code] for emp_code in base.employees]
+        device_map = [device_index[device] for device in base.devices]
+        if emp_map == list(range(len(emp_map))) and device_map == list(range(len(device_map))) and not added:
+            #Nothing new: the snapshot's columns are already in order
+            return base.emp, base.stamp, base.dev
+        if np is not None:
+            emp.frombytes(np.array(emp_map, dtype='I')[np.frombuffer(base.emp, dtype='I')].tobytes())
+            dev.frombytes(np.array(device_map, dtype='I')[np.frombuffer(base.dev, dtype='I')].tobytes())
+        else:
+            emp.extend(map(emp_map.__getitem__, base.emp))
+            dev.extend(map(device_map.__getitem__, base.dev))
+        stamp.frombytes(base.stamp.cast('B'))
+
+    if np is not None and stamp:
+        emp_values, stamp_values, dev_values = np.frombuffer(emp, dtype='I'), np.frombuffer(stamp, dtype='d'), np.frombuffer(dev, dtype='I')
+        order = np.lexsort((dev_values, stamp_values, emp_values))
+        return array_from_numpy('I', emp_values[order]), array_from_numpy('d', stamp_values[order]), array_from_numpy('I', dev_values[order])
+
+    rows = sorted(zip(emp, stamp, dev))
+    return array('I', map(itemgetter(0), rows)), array('d', map(itemgetter(1), rows)), array('I', map(itemgetter(2), rows))
+
+
+def load_snapshot(filepath: str) -> Tuple[PunchStore, 'SortedRecords']:
+    #Columns are cast in place over the mapped file, nothing is copied until new punches are added
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < SNAPSHOT_HEADER.size:
+            raise ValueError(f"'{filepath}' is not an attendance snapshot")
+        view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    magic, version, names_length, punches, records, checksum = SNAPSHOT_HEADER.unpack_from(view)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"'{filepath}' is not an attendance snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"'{filepath}' has snapshot version {version}, expected {SNAPSHOT_VERSION}")
+    if hashlib.sha256(view[SNAPSHOT_HEADER.size:]).digest() != checksum:
+        raise ValueError(f"'{filepath}' is corrupt (checksum mismatch)")
+
+    offset = SNAPSHOT_HEADER.size
+    employees, devices = json.loads(str(view[offset:offset + names_length], 'utf-8'))
+    offset += names_length + -names_length % 8
+    counts = {'punches': punches, 'records': records}
+    columns = {}
+    for name, typecode, count in SNAPSHOT_COLUMNS:
+        size = counts[count] * array(typecode).itemsize
+        columns[name] = view[offset:offset + size].cast(typecode)
+        offset += size + -size % 8
+
+    attendance_data = PunchStore()
+    attendance_data.employees = employees
+    attendance_data.employee_index = {emp_code: emp_id for emp_id, emp_code in enumerate(employees)}
+    attendance_data.devices = devices
+    attendance_data.device_index = {device: device_id for device_id, device in enumerate(devices)}
+    attendance_data.emp, attendance_data.ts, attendance_data.dev = columns['emp'], columns['ts'], columns['dev']
+    return attendance_data, SortedRecords(employees, devices, columns['record_emp'], columns['record_stamp'], columns['record_dev'])
+
+
+class RecordSetMixin:
+    #Set operations merge_partial needs, for dedup engines that only answer membership
+    def intersection(self, records: Iterable[Tuple]) -> set:
+        return {record_id for record_id in records if record_id in self}
+
+
+class SortedRecords(RecordSetMixin):
+    #processed_records as (emp id, stamp, device id) columns sorted in that order, e.g. mapped from a snapshot;
+    #lookups bisect the columns, new records go to a plain set
+    def __init__(self, employees: List[str], devices: List[str], emp, stamp, dev):
+        self.employees = list(employees)
+        self.employee_index = {emp_code: emp_id for emp_id, emp_code in enumerate(employees)}
+        self.devices = list(devices)
+        self.device_index = {device: device_id for device_id, device in enumerate(devices)}
+        self.emp, self.stamp, self.dev = emp, stamp, dev
+        self.ranges = {}
+        self.added = set()
+
+    def __len__(self) -> int:
+        return len(self.stamp) + len(self.added)
+
+    def __contains__(self, record_id: Tuple) -> bool:
+        return record_id in self.added or self.in_snapshot(record_id)
+
+    def in_snapshot(self, record_id: Tuple) -> bool:
+        emp_code, stamp, device = record_id
+        emp_id = self.employee_index.get(emp_code)
+        device_id = self.device_index.get(device)
+        if emp_id is None or device_id is None:
+            return False
+
+        span = self.ranges.get(emp_id)
+        if span is None:
+            start = bisect_left(self.emp, emp_id)
+            span = self.ranges[emp_id] = (start, bisect_right(self.emp, emp_id, start))
+        i, end = bisect_left(self.stamp, stamp, *span), span[1]
+        while i < end and self.stamp[i] == stamp:
+            if self.dev[i] == device_id:
+                return True
+            i += 1
+        return False
+
+    def add(self, record_id: Tuple) -> None:
+        self.added.add(record_id)
+
+    def update(self, records: Iterable[Tuple]) -> None:
+        self.added.update(records)
+
+
+class PackedRecordSet(RecordSetMixin):
+    #One int per record: emp id, device id and the biased epoch; a record that does not fit the layout is kept as its tuple
+    def __init__(self):
+        self.employee_index = {}
+        self.device_index = {}
+        self.keys = set()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def key(self, record_id: Tuple, add: bool = False):
+        emp_code, stamp, device = record_id
+        emp_id = self.employee_index.get(emp_code)
+        device_id = self.device_index.get(device)
+        if emp_id is None or device_id is None:
+            if not add:
+                return None
+            emp_id = self.employee_index.setdefault(emp_code, len(self.employee_index))
+            device_id = self.device_index.setdefault(device, len(self.device_index))
+
+        seconds = int(stamp) + PACKED_STAMP_BIAS
+        if seconds - PACKED_STAMP_BIAS == stamp and 0 <= seconds < PACKED_STAMP_LIMIT and device_id < PACKED_DEVICE_LIMIT:
+            return (emp_id << PACKED_DEVICE_BITS | device_id) << PACKED_STAMP_BITS | seconds
+        return record_id
+
+    def __contains__(self, record_id: Tuple) -> bool:
+        key = self.key(record_id)
+        return key is not None and key in self.keys
+
+    def add(self, record_id: Tuple) -> None:
+        self.keys.add(self.key(record_id, True))
+
+    def update(self, records: Iterable[Tuple]) -> None:
+        self.keys.update(self.key(record_id, True) for record_id in records)
+
+
+class OrderedRecordSet(set):
+    #A set that also keeps the stamp of every record added, in punch order, so merge_partial can match rows to records
+    def __init__(self, records: Iterable[Tuple] = ()):
+        super().__init__(records)
+        self.stamps = array('d')
+
+    def add(self, record_id: Tuple) -> None:
+        set.add(self, record_id)
+        self.stamps.append(record_id[1])
+
+    def update(self, records: Iterable[Tuple]) -> None:
+        records = list(records)
+        set.update(self, records)
+        self.stamps.extend(map(itemgetter(1), records))
+
+
+class DeferredRecords:
+    #The sort engine checks nothing while reading; stamps are kept in punch order and unique_punches drops the repeats
+    def __init__(self):
+        self.stamps = array('d')
+
+    def __len__(self) -> int:
+        return len(self.stamps)
+
+    def __contains__(self, record_id: Tuple) -> bool:
+        return False
+
+    def intersection(self, records: Iterable[Tuple]) -> set:
+        return set()
+
+    def add(self, record_id: Tuple) -> None:
+        self.stamps.append(record_id[1])
+
+    def update(self, records: Iterable[Tuple]) -> None:
+        if isinstance(records, DeferredRecords):
+            self.stamps.extend(records.stamps)
+        else:
+            self.stamps.extend(map(itemgetter(1), records))
+
+
+def unique_punches(attendance_data: PunchStore, records: DeferredRecords, error_log: ErrorLog = None) -> SortedRecords:
+    #Sort by (emp, stamp, device) keeping punch order among equal records, then keep the first of every run
+    removed = 0
+    count = len(attendance_data)
+    if np is not None and count:
+        emp = np.frombuffer(attendance_data.emp, dtype='I')
+        stamp = np.frombuffer(records.stamps, dtype='d')
+        dev = np.frombuffer(attendance_data.dev, dtype='I')
+        order = np.lexsort((dev, stamp, emp))
+        emp_sorted, stamp_sorted, dev_sorted = emp[order], stamp[order], dev[order]
+        first = np.ones(count, dtype=bool)
+        first[1:] = (emp_sorted[1:] != emp_sorted[:-1]) | (stamp_sorted[1:] != stamp_sorted[:-1]) | (dev_sorted[1:] != dev_sorted[:-1])
+        order = order[first]
+        removed = count - len(order)
+        if removed:
+            keep = np.zeros(count, dtype=bool)
+            keep[order] = True
+            attendance_data.emp = array_from_numpy('I', emp[keep])
+            attendance_data.ts = array_from_numpy('q', np.frombuffer(attendance_data.ts, dtype='q')[keep])
+            attendance_data.dev = array_from_numpy('I', dev[keep])
+        sorted_records = (array_from_numpy('I', emp[order]), array_from_numpy('d', stamp[order]), array_from_numpy('I', dev[order]))
+    else:
+        emp, stamp, dev = attendance_data.emp, records.stamps, attendance_data.dev
+        keys = list(zip(emp, stamp, dev))
+        ranked = sorted(range(count), key=keys.__getitem__)
+        order = [i for position, i in enumerate(ranked) if position == 0 or keys[i] != keys[ranked[position - 1]]]
+        removed = count - len(order)
+        if removed:
+            kept = sorted(order)
+            attendance_data.emp = array('I', map(emp.__getitem__, kept))
+            attendance_data.ts = array('q', map(attendance_data.ts.__getitem__, kept))
+            attendance_data.dev = array('I', map(dev.__getitem__, kept))
+        sorted_records = (array('I', map(emp.__getitem__, order)), array('d', map(stamp.__getitem__, order)), array('I', map(dev.__getitem__, order)))
+
+    if error_log is not None:
+        error_log.row_stats['accepted'] -= removed
+        error_log.row_stats['deduplicated'] += removed
+    return SortedRecords(attendance_data.employees, attendance_data.devices, *sorted_records)
+
+
+class DiskRecordSet(RecordSetMixin):
+    #Records in a temporary SQLite table with a bounded page cache, for dedup state larger than memory
+    def __init__(self, cache_kib: int = DISK_DEDUP_CACHE_KIB):
+        fd, self.path = tempfile.mkstemp(prefix='attendance_dedup_', suffix='.db')
+        os.close(fd)
+        self.employee_index = {}
+        self.device_index = {}
+        self.count = 0
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA journal_mode = OFF")
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.connection.execute(f"PRAGMA cache_size = -{cache_kib}")
+        self.connection.execute("CREATE TABLE records (emp INTEGER, device INTEGER, stamp REAL, PRIMARY KEY (emp, device, stamp)) WITHOUT ROWID")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, record_id: Tuple) -> bool:
+        emp_code, stamp, device = record_id
+        emp_id = self.employee_index.get(emp_code)
+        device_id = self.device_index.get(device)
+        if emp_id is None or device_id is None:
+            return False
+        return self.connection.execute("SELECT 1 FROM records WHERE emp = ? AND device = ? AND stamp = ?", (emp_id, device_id, stamp)).fetchone() is not None
+
+    def add(self, record_id: Tuple) -> None:
+        self.update((record_id,))
+
+    def update(self, records: Iterable[Tuple]) -> None:
+        rows = [(self.employee_index.setdefault(emp_code, len(self.employee_index)), self.device_index.setdefault(device, len(self.device_index)), stamp)
+                for emp_code, stamp, device in records]
+        changes = self.connection.total_changes
+        self.connection.executemany("INSERT OR IGNORE INTO records VALUES (?, ?, ?)", rows)
+        self.count += self.connection.total_changes - changes
+
+    def close(self) -> None:
+        self.connection.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+DEDUP_ENGINES = {'set': set, 'packed': PackedRecordSet, 'sort': DeferredRecords, 'disk': DiskRecordSet}
+WORKER_DEDUP_ENGINES = {'ordered': OrderedRecordSet, 'sort': DeferredRecords}
+
+
+def write_atomic(filepath: str, data: bytes) -> None:
+    tmp_path = filepath + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, filepath)
+
+
+def process_row(row: Dict, filepath: str, row_num: int, attendance_data: PunchStore, error_log: ErrorLog, processed_records: set, timestamp_parser: 'TimestampParser' = None) -> None:
+    try:
+        emp_code = row.get('emp_code', '').strip()
+        first_name = row.get('first_name', '').strip()
+        last_name = row.get('last_name', '').strip()
+        timestamp = row.get('timestamp', '').strip()
+        device = row.get('device', '').strip()
+
+        if not emp_code or not first_name or not last_name or not timestamp or not device:
+            error_log.add('missing_fields', filepath, row_num)
+            error_log.row_stats['rejected_missing_fields'] += 1
+            return
+
+        if not emp_code.isalnum():
+            error_log.add('emp_code', filepath, row_num)
+            error_log.row_stats['rejected_emp_code'] += 1
+            return
+        if not first_name.isalpha():
+            error_log.add('first_name', filepath, row_num)
+            error_log.row_stats['rejected_first_name'] += 1
+            return
+        if not last_name.isalpha():
+            error_log.add('last_name', filepath, row_num)
+            error_log.row_stats['rejected_last_name'] += 1
+            return
+        if not timestamp.isdigit() and not any(c in timestamp for c in ['-', '/', ':']):
+            error_log.add('timestamp_format', filepath, row_num)
+            error_log.row_stats['rejected_timestamp_format'] += 1
+            return
+        if not device:
+            error_log.add('device', filepath, row_num)
+
+
+        dt = timestamp_parser.parse(timestamp) if timestamp_parser else parse_timestamp(timestamp)
+        if dt is None:
+            error_log.add('invalid_timestamp', filepath, row_num)
+            error_log.row_stats['rejected_invalid_timestamp'] += 1
+            return
+
+        record_id = (emp_code, dt.timestamp(), device)
+        if record_id in processed_records:
+            error_log.row_stats['deduplicated'] += 1
+            return
+
+        processed_records.add(record_id)
+        attendance_data.append(emp_code, dt, device)
+        error_log.row_stats['accepted'] += 1
+
+    except Exception as e:
+        error_log.add('row_error', filepath, row_num, str(e))
+        error_log.row_stats['rejected_row_error'] += 1
+
+def parse_timestamp(timestamp:str) -> datetime:
+    return parse_timestamp_with_format(timestamp)[0]
+
+
+def parse_timestamp_with_format(timestamp: str) -> Tuple[datetime, int]:
+    try:
+        if timestamp.isdigit():
+            return datetime.fromtimestamp(int(timestamp)), -1
+
+        for index, fmt in enumerate(TIMESTAMP_FORMATS):
+            try:
+                return datetime.strptime(timestamp, fmt), index
+            except ValueError:
+                continue
+        return None, -1
+    except:
+        return None, -1
+
+
+def parse_epoch(timestamp: str) -> datetime:
+    try:
+        return datetime.fromtimestamp(int(timestamp))
+    except:
+        return None
+
+
+def compile_timestamp_shape(fmt: str) -> Tuple[str, List[str]]:
+    pattern = ''
+    fields = []
+    i = 0
+    while i < len(fmt):
+        if fmt[i] == '%':
+            directive = fmt[i + 1]
+            pattern += '([0-9]{4})' if directive == 'Y' else '([0-9]{1,2})'
+            fields.append(directive)
+            i += 2
+        else:
+            pattern += re.escape(fmt[i])
+            i += 1
+    return pattern, fields
+
+
+def build_timestamp_shapes() -> Dict:
+    #Formats with the same shape (e.g. %m/%d/%Y and %d/%m/%Y) are tried in TIMESTAMP_FORMATS order,
+    #strings of one shape never parse under a format of another shape
+    shapes = {}
+    for fmt in TIMESTAMP_FORMATS:
+        pattern, fields = compile_timestamp_shape(fmt)
+        field_order = [fields.index(directive) if directive in fields else None for directive in 'YmdHMS']
+        shapes.setdefault(pattern, []).append(field_order)
+    return {pattern: (re.compile(pattern), orders) for pattern, orders in shapes.items()}
+
+
+TIMESTAMP_SHAPES = build_timestamp_shapes()
+TIMESTAMP_FORMAT_SHAPES = [compile_timestamp_shape(fmt)[0] for fmt in TIMESTAMP_FORMATS]
+
+
+class TimestampParser:
+    def __init__(self):
+        self.shape_counts = defaultdict(int)
+        self.regex = None
+        self.field_orders = None
+        self.epoch_cache = {}
+        self.epoch_lookups = 0
+        self.epoch_misses = 0
+
+    def parse(self, timestamp: str) -> datetime:
+        if timestamp.isdigit():
+            if self.epoch_cache is None:
+                return parse_epoch(timestamp)
+            return self.parse_cached_epoch(timestamp)
+
+        if self.regex is not None:
+            match = self.regex.fullmatch(timestamp)
+            if match:
+                values = match.groups()
+                for order in self.field_orders:
+                    try:
+                        return datetime(*[int(values[index]) if index is not None else 0 for index in order])
+                    except ValueError:
+                        continue
+            return parse_timestamp(timestamp)
+
+        dt, index = parse_timestamp_with_format(timestamp)
+        if index >= 0:
+            self.detect(TIMESTAMP_FORMAT_SHAPES[index])
+        return dt
+
+    def parse_cached_epoch(self, timestamp: str) -> datetime:
+        self.epoch_lookups += 1
+        dt = self.epoch_cache.get(timestamp)
+        if dt is None:
+            self.epoch_misses += 1
+            if len(self.epoch_cache) >= EPOCH_CACHE_SIZE:
+                self.epoch_cache.clear()
+            dt = self.epoch_cache[timestamp] = parse_epoch(timestamp)
+
+        #Mostly unique epochs cost more to cache than to convert
+        if self.epoch_lookups == EPOCH_CACHE_PROBE and self.epoch_misses * 4 > self.epoch_lookups * 3:
+            self.epoch_cache = None
+        return dt
+
+    def detect(self, shape: str) -> None:
+        self.shape_counts[shape] += 1
+        if self.shape_counts[shape] >= TIMESTAMP_DETECT_ROWS:
+            self.regex, self.field_orders = TIMESTAMP_SHAPES[shape]
+
+
+def summary_columns(attendance_date: PunchStore) -> Dict[str, list]:
+    #One row per (employee, day) group, reduced at the group boundaries of the sorted store
+    attendance_date.sort()
+
+    if np is not None and len(attendance_date):
+        emp = np.frombuffer(attendance_date.emp, dtype='I')
+        ts = np.frombuffer(attendance_date.ts, dtype='q')
+        day = ts // SECONDS_PER_DAY
+
+        boundary = np.empty(len(ts), dtype=bool)
+        boundary[0] = True
+        np.logical_or(emp[1:] != emp[:-1], day[1:] != day[:-1], out=boundary[1:])
+        starts = np.flatnonzero(boundary)
+        ends = np.append(starts[1:], len(ts))
+
+        days = day[starts]
+        first = ts[starts]
+        last = ts[ends - 1]
+        counts = ends - starts
+        return {
+            'emp_id': emp[starts].tolist(),
+            'day': days.tolist(),
+            'first_minute': ((first - days * SECONDS_PER_DAY) // 60).tolist(),
+            'last_minute': ((last - days * SECONDS_PER_DAY) // 60).tolist(),
+            'total_punches': counts.tolist(),
+            'work_minutes': ((last - first) // 60).tolist(),
+            'late_entry': (first - days * SECONDS_PER_DAY > LATE_THRESHOLD_SECONDS).astype('i').tolist(),
+            'early_exit': (last - days * SECONDS_PER_DAY < EARLY_THRESHOLD_SECONDS).astype('i').tolist(),
+            'single_punch': (counts == 1).astype('i').tolist()
+        }
+
+    ts = attendance_date.ts
+    groups = list(attendance_date.day_groups())
+    first = [ts[start] - day * SECONDS_PER_DAY for _, day, start, _ in groups]
+    last = [ts[end - 1] - day * SECONDS_PER_DAY for _, day, _, end in groups]
+    counts = [end - start for _, _, start, end in groups]
+    return {
+        'emp_id': [emp_id for emp_id, _, _, _ in groups],
+        'day': [day for _, day, _, _ in groups],
+        'first_minute': [seconds // 60 for seconds in first],
+        'last_minute': [seconds // 60 for seconds in last],
+        'total_punches': counts,
+        'work_minutes': [(last_seconds - first_seconds) // 60 for first_seconds, last_seconds in zip(first, last)],
+        'late_entry': [1 if seconds > LATE_THRESHOLD_SECONDS else 0 for seconds in first],
+        'early_exit': [1 if seconds < EARLY_THRESHOLD_SECONDS else 0 for seconds in last],
+        'single_punch': [1 if count == 1 else 0 for count in counts]
+    }
+
+
+def calculate_summary(attendance_date: PunchStore) -> Dict:
+    return summary_from_columns(summary_columns(attendance_date), attendance_date.employees)
+
+
+def summary_from_columns(columns: Dict[str, list], employees: List[str]) -> Dict:
+    summary = {}
+    date_keys = {}
+
+    #Groups come out in (emp_code, date) order, so every date's list is already sorted by emp_code
+    for emp_id, day, first_minute, last_minute, total_punches, work_minutes, late_entry, early_exit, single_punch in zip(
+            columns['emp_id'], columns['day'], columns['first_minute'], columns['last_minute'], columns['total_punches'],
+            columns['work_minutes'], columns['late_entry'], columns['early_exit'], columns['single_punch']):
+        records = date_keys.get(day)
+        if records is None:
+            records = date_keys[day] = summary[day_to_date_key(day)] = []
+
+        records.append({
+            'emp_code': employees[emp_id],
+            'first_punch': CLOCK_LABELS[first_minute],
+            'last_punch': CLOCK_LABELS[last_minute],
+            'total_punches': total_punches,
+            'working_hours': CLOCK_LABELS[work_minutes],
+            'late_entry': late_entry,
+            'early_exit': early_exit,
+            'single_punch': single_punch
+        })
+
+    return summary
+
+
+def day_totals(day: int, first_punch: int, last_punch: int, total_punches: int) -> Tuple[int, int, int, int, int]:
+    #One day's ROLLUP_COLUMNS values from its first and last punch
+    return (
+        total_punches,
+        (last_punch - first_punch) // 60,
+        1 if first_punch - day * SECONDS_PER_DAY > LATE_THRESHOLD_SECONDS else 0,
+        1 if last_punch - day * SECONDS_PER_DAY < EARLY_THRESHOLD_SECONDS else 0,
+        1 if total_punches == 1 else 0
+    )
+
+
+def parse_period(period: str) -> Tuple[int, int]:
+    #(length in days, anchor day) of a period; months have length 0, and custom '<days>d[@<YYYY-MM-DD>]' periods count from a Monday by default
+    if period == 'month':
+        return 0, 0
+    if period == 'week':
+        return 7, ROLLUP_ANCHOR.toordinal() - EPOCH_ORDINAL
+    match = ROLLUP_PERIOD_PATTERN.fullmatch(period)
+    if match is None or int(match.group(1)) == 0:
+        return None
+    try:
+        anchor = date.fromisoformat(match.group(2)) if match.group(2) else ROLLUP_ANCHOR
+    except ValueError:
+        return None
+    return int(match.group(1)), anchor.toordinal() - EPOCH_ORDINAL
+
+
+def period_bounds(length: int, anchor: int, day: int) -> Tuple[int, int]:
+    if not length:
+        day_date = date.fromordinal(EPOCH_ORDINAL + day)
+        next_month = date(day_date.year + day_date.month // 12, day_date.month % 12 + 1, 1)
+        return day - day_date.day + 1, next_month.toordinal() - EPOCH_ORDINAL - 1
+    start = day - (day - anchor) % length
+    return start, start + length - 1
+
+
+def period_label(period: str, start: int) -> str:
+    start_date = date.fromordinal(EPOCH_ORDINAL + start)
+    if period == 'week':
+        year, week, _ = start_date.isocalendar()
+        return f"{year}-W{week:02d}"
+    if period == 'month':
+        return start_date.isoformat()[:7]
+    return start_date.isoformat()
+
+
+def format_minutes(minutes: int) -> str:
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+class PeriodRollups:
+    #Per-employee totals over weeks, months and custom periods; values stay numeric so single days can be added or withdrawn
+    def __init__(self, periods: List[str] = ROLLUP_PERIODS):
+        self.periods = list(periods)
+        self.specs = {period: parse_period(period) for period in self.periods}
+        self.totals = {period: defaultdict(dict) for period in self.periods}
+        self.bounds = {period: {} for period in self.periods}
+
+    def __len__(self) -> int:
+        return sum(len(starts) for totals in self.totals.values() for starts in totals.values())
+
+    def period_bounds(self, period: str, day: int) -> Tuple[int, int]:
+        bounds = self.bounds[period].get(day)
+        if bounds is None:
+            bounds = self.bounds[period][day] = period_bounds(*self.specs[period], day)
+        return bounds
+
+    def add(self, period: str, emp_code: str, start: int, values: List[int]) -> None:
+        #values are ROLLUP_FIELDS; a period left without days is dropped
+        starts = self.totals[period][emp_code]
+        totals = starts.get(start)
+        if totals is None:
+            starts[start] = list(values)
+            return
+        for i, value in enumerate(values):
+            totals[i] += value
+        if not totals[0]:
+            del starts[start]
+
+    def add_day(self, emp_code: str, day: int, values: Tuple, sign: int = 1) -> None:
+        #Only the periods holding this day change; sign -1 withdraws a day's previous values
+        values = [sign] + [sign * value for value in values]
+        for period in self.periods:
+            self.add(period, emp_code, self.period_bounds(period, day)[0], values)
+
+    def add_columns(self, columns: Dict[str, list], employees: List[str]) -> None:
+        #summary_columns rows are sorted by (employee, day), so every (employee, period) is one run of rows
+        count = len(columns['day'])
+        if not count:
+            return
+
+        if np is not None:
+            day = np.asarray(columns['day'], dtype='q')
+            emp = np.asarray(columns['emp_id'], dtype='q')
+            values = [np.asarray(columns[name], dtype='q') for name in ROLLUP_COLUMNS]
+            unique_days, inverse = np.unique(day, return_inverse=True)
+
+        for period in self.periods:
+            if np is not None:
+                starts = np.array([self.period_bounds(period, value)[0] for value in unique_days.tolist()], dtype='q')[inverse]
+                boundary = np.empty(count, dtype=bool)
+                boundary[0] = True
+                np.logical_or(emp[1:] != emp[:-1], starts[1:] != starts[:-1], out=boundary[1:])
+                group_starts = np.flatnonzero(boundary)
+                sums = [np.diff(np.append(group_starts, count))] + [np.add.reduceat(value, group_starts) for value in values]
+                groups = zip(emp[group_starts].tolist(), starts[group_starts].tolist(), *(total.tolist() for total in sums))
+            else:
+                groups = rollup_groups(columns, [self.period_bounds(period, value)[0] for value in columns['day']])
+
+            for emp_id, start, *totals in groups:
+                self.add(period, employees[emp_id], start, totals)
+
+    def add_summary(self, summary: Dict, emp_code: str = None) -> None:
+        #calculate_summary records carry every ROLLUP_COLUMNS value, working_hours being the HH:MM label of the worked minutes
+        for date_key, records in summary.items():
+            day = date_to_day(date_key)
+            for record in records:
+                if emp_code is None or record['emp_code'] == emp_code:
+                    hours, minutes = record['working_hours'].split(':')
+                    values = (record['total_punches'], int(hours) * 60 + int(minutes), record['late_entry'], record['early_exit'], record['single_punch'])
+                    self.add_day(record['emp_code'], day, values)
+
+    def records(self, period: str, emp_code: str = None, date: str = None) -> List[Dict]:
+        #Ordered by period start, then emp_code; a date narrows the result to the period holding it
+        if period not in self.totals:
+            return []
+        totals = self.totals[period]
+        if emp_code is None:
+            emp_codes = sorted(code for code in totals if totals[code])
+        else:
+            emp_codes = [emp_code] if totals.get(emp_code) else []
+        only = self.period_bounds(period, date_to_day(date))[0] if date else None
+
+        rows = [(start, code, values) for code in emp_codes for start, values in totals[code].items() if only is None or start == only]
+        rows.sort(key=itemgetter(0))
+        return [rollup_record(period, start, self.period_bounds(period, start)[1], code, values) for start, code, values in rows]
+
+
+def rollup_groups(columns: Dict[str, list], starts: List[int]) -> List[List[int]]:
+    groups = []
+    previous = None
+    for emp_id, start, *values in zip(columns['emp_id'], starts, *(columns[name] for name in ROLLUP_COLUMNS)):
+        if (emp_id, start) != previous:
+            group = [emp_id, start] + [0] * len(ROLLUP_FIELDS)
+            groups.append(group)
+            previous = (emp_id, start)
+        group[2] += 1
+        for i, value in enumerate(values, start=3):
+            group[i] += value
+    return groups
+
+
+def date_to_day(date_key: str) -> int:
+    return date.fromisoformat(date_key).toordinal() - EPOCH_ORDINAL
+
+
+def rollup_record(period: str, start: int, end: int, emp_code: str, values: List[int]) -> Dict:
+    return {
+        'type': period,
+        'period': period_label(period, start),
+        'start': day_to_date_key(start),
+        'end': day_to_date_key(end),
+        'emp_code': emp_code,
+        **dict(zip(ROLLUP_FIELDS, values))
+    }
+
+def save_json_summary(summary: Dict, output_folder: str = OUTPUT_FOLDER, output_file: str='attendance_summery.json') -> None:
+    os.makedirs(output_folder, exist_ok=True)
+    filepath = os.path.join(output_folder, output_file)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=4)
+        print(f"Summary saved to '{filepath}'.")
+
+def save_excel_summary(summary: Dict, output_folder: str = OUTPUT_FOLDER, output_file: str='attendance_summery.xlsx') -> None:
+    os.makedirs(output_folder, exist_ok=True)
+    filepath = os.path.join(output_folder, output_file)
+
+    def rows():
+        for date in sorted(summary.keys()):
+            for record in summary[date]:
+                yield excel_row(date, record)
+
+    write_excel_report(filepath, 'Attendance Summary', rows)
+
+
+def excel_row(date: str, record: Dict) -> List:
+    return [
+        date,
+        record.get('emp_code', ''),
+        record.get('first_punch', ''),
+        record.get('last_punch', ''),
+        record.get('total_punches', ''),
+        record.get('working_hours', ''),
+        'YES' if record.get('late_entry', 0) else 'No',
+        'YES' if record.get('early_exit', 0) else 'No',
+        'YES' if record.get('single_punch', 0) else 'No'
+    ]
+
+
+def write_excel_report(filepath: str, title: str, rows: Callable[[], Iterable[List]], header: List[str] = EXCEL_HEADER) -> None:
+    #Write-only sheets emit column widths before the first row, so widths come from a first pass over the values
+    widths = [len(text) for text in header]
+    for row in rows():
+        for col, value in enumerate(row):
+            length = len(str(value))
+            if length > widths[col]:
+                widths[col] = length
+
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment
+    from openpyxl.utils import get_column_letter
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    for col, width in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(col)].width = min(width + 2, EXCEL_MAX_COLUMN_WIDTH)
+
+    header_font = Font(bold=True, color='000000', size=12)
+    header_alignment = Alignment(horizontal='center', vertical='center')
+    header_cells = []
+    for header_text in header:
+        cell = WriteOnlyCell(ws, value=header_text)
+        cell.font = header_font
+        cell.alignment = header_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    for row in rows():
+        ws.append(row)
+
+    wb.save(filepath)
+
+
+def save_rollup_report(rollups: PeriodRollups, output_folder: str = OUTPUT_FOLDER, output_file: str = 'attendance_rollups', excel: bool = True) -> None:
+    os.makedirs(output_folder, exist_ok=True)
+    reports = {period: rollups.records(period) for period in rollups.periods}
+
+    filepath = os.path.join(output_folder, output_file + '.json')
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(reports, f, indent=4)
+    if excel:
+        save_rollup_excel(list(chain.from_iterable(reports.values())), output_folder, output_file + '.xlsx', 'Attendance Rollups')
+    print(f"Rollups saved to '{filepath}'.")
+
+
+def save_rollup_excel(records: List[Dict], output_folder: str = OUTPUT_FOLDER, output_file: str = 'attendance_rollups.xlsx', title: str = 'Attendance Rollups') -> None:
+    os.makedirs(output_folder, exist_ok=True)
+
+    def rows():
+        for record in records:
+            yield rollup_excel_row(record)
+
+    write_excel_report(os.path.join(output_folder, output_file), title, rows, ROLLUP_HEADER)
+
+
+def rollup_excel_row(record: Dict) -> List:
+    return [
+        record['type'],
+        record['period'],
+        record['start'],
+        record['end'],
+        record['emp_code'],
+        record['days'],
+        record['total_punches'],
+        record['worked_minutes'],
+        format_minutes(record['worked_minutes']),
+        record['late_entries'],
+        record['early_exits'],
+        record['single_punches']
+    ]
+
+
+def save_summary_shards(summary: Dict, prefix_length: int = 0, workers: int = 1, output_folder: str = os.path.join(OUTPUT_FOLDER, SHARD_FOLDER)) -> None:
+    #One JSON Lines file and one sheet per month (and emp_code prefix), listed in a manifest with a digest per shard
+    os.makedirs(output_folder, exist_ok=True)
+    manifest_path = os.path.join(output_folder, SHARD_MANIFEST)
+    previous = {}
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                previous = {shard['name']: shard for shard in json.load(f)['shards']}
+        except (ValueError, KeyError, TypeError):
+            previous = {}
+
+    shards = partition_summary(summary, prefix_length)
+    tasks = [(output_folder, name, rows, previous.get(name, {}).get('sha256')) for name, rows in sorted(shards.items())]
+    if workers > 1 and len(tasks) > 1:
+        with concurrent_futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(write_shard_task, *zip(*tasks)))
+    else:
+        results = [write_shard_task(*task) for task in tasks]
+
+    entries = []
+    for (_, name, rows, _), (digest, _) in zip(tasks, results):
+        entry = {
+            'name': name,
+            'month': name.split('/')[0],
+            'json': name + '.jsonl',
+            'excel': name + '.xlsx',
+            'first_date': rows[0][0],
+            'last_date': rows[-1][0],
+            'rows': len(rows),
+            'sha256': digest
+        }
+        if prefix_length:
+            entry['prefix'] = name.split('/')[1]
+        entries.append(entry)
+
+    #Shards that no longer exist, e.g. after changing the prefix length, are removed
+    for name, shard in previous.items():
+        if name not in shards:
+            for key in ('json', 'excel'):
+                stale = os.path.join(output_folder, shard.get(key, ''))
+                if shard.get(key) and os.path.isfile(stale):
+                    os.remove(stale)
+
+    manifest = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'partition': ['month', f'emp_code[:{prefix_length}]'] if prefix_length else ['month'],
+        'shards': entries
+    }
+    write_atomic(manifest_path, json.dumps(manifest, indent=4).encode('utf-8'))
+    written = sum(1 for _, changed in results if changed)
+    print(f"Summary shards saved to '{output_folder}': {written} of {len(results)} written, {len(results) - written} unchanged.")
+
+
+def partition_summary(summary: Dict, prefix_length: int = 0) -> Dict[str, List[Tuple[str, Dict]]]:
+    shards = defaultdict(list)
+    for date in sorted(summary):
+        month = date[:7]
+        for record in summary[date]:
+            name = f"{month}/{record['emp_code'][:prefix_length]}" if prefix_length else month
+            shards[name].append((date, record))
+    return shards
+
+
+def write_shard_task(output_folder: str, name: str, rows: List[Tuple[str, Dict]], previous_digest: str = None) -> Tuple[str, bool]:
+    #Both files are left alone when the shard's content digest matches the manifest
+    data = ''.join(json.dumps({'date': date, **record}, separators=(',', ':')) + '\n' for date, record in rows).encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()
+    json_path = os.path.join(output_folder, name + '.jsonl')
+    excel_path = os.path.join(output_folder, name + '.xlsx')
+    if digest == previous_digest and os.path.exists(json_path) and os.path.exists(excel_path):
+        return digest, False
+
+    os.makedirs(os.path.dirname(json_path), exist_ok=True)
+    write_atomic(json_path, data)
+    write_excel_report(excel_path, f"Attendance {name.replace('/', ' ')}", lambda: (excel_row(date, record) for date, record in rows))
+    return digest, True
+
+def save_error_log(error_log: ErrorLog, output_folder: str = OUTPUT_FOLDER, output_file: str='error_log.txt') -> None:
+    os.makedirs(output_folder, exist_ok=True)
+    filepath = os.path.join(output_folder, output_file)
+    error_log.flush()
+    with open(filepath, 'w', encoding='utf-8') as f:
+        if error_log:
+            code_totals = defaultdict(int)
+            file_totals = defaultdict(dict)
+            for (file_id, code), count in error_log.counts.items():
+                code_totals[code] += count
+                file_totals[file_id][code] = count
+            codes = sorted(code_totals, key=lambda code: (-code_totals[code], code))
+
+            f.write(f"Total Errors: {len(error_log)}\n")
+            f.write(("=" * 80 + "\n\n"))
+            f.write("Errors by code:\n")
+            for code in codes:
+                f.write(f"  {code:<24}{code_totals[code]:>10}\n")
+
+            f.write("\nErrors by file:\n")
+            for file_id in sorted(file_totals):
+                f.write(f"  [{file_id}] {error_log.files[file_id]}: {sum(file_totals[file_id].values())}\n")
+                for code in sorted(file_totals[file_id], key=lambda code: (-file_totals[file_id][code], code)):
+                    f.write(f"    {code:<22}{file_totals[file_id][code]:>10}\n")
+
+            f.write(f"\nSample rows (first {error_log.sample_limit} per code):\n")
+            for code in codes:
+                samples = error_log.samples[code]
+                f.write(f"\n[{code}] {len(samples)} of {code_totals[code]}\n")
+                for sample in samples:
+                    f.write(error_log.message(code, *sample) + "\n")
+
+            if error_log.spool_path is not None:
+                f.write(f"\nAll error records: '{error_log.spool_path}'\n")
+        else:
+            f.write("No errors found.")
+    print(f"Error log saved to '{filepath}'.")
+
+
+def log_folder_signature(log_folder: str) -> str:
+    #Changes whenever a log file is added, removed or written to, or the shift thresholds change
+    entries = [LATE_THRESHOLD.isoformat(), EARLY_THRESHOLD.isoformat()]
+    if os.path.exists(log_folder):
+        for file in sorted(f for f in os.listdir(log_folder) if is_log_file(f)):
+            stat = os.stat(os.path.join(log_folder, file))
+            entries.append([file, stat.st_size, stat.st_mtime_ns])
+    return hashlib.sha256(json.dumps(entries).encode('utf-8')).hexdigest()
+
+
+def save_summary_store(summary: Dict, signature: str, output_folder: str = OUTPUT_FOLDER, output_file: str = SUMMARY_DB_FILE, rollups: PeriodRollups = None) -> None:
+    os.makedirs(output_folder, exist_ok=True)
+    filepath = os.path.join(output_folder, output_file)
+    tmp_path = filepath + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        connection.execute(
+            "CREATE TABLE summary (emp_code TEXT, date TEXT, first_punch TEXT, last_punch TEXT, total_punches INTEGER, "
+            "working_hours TEXT, late_entry INTEGER, early_exit INTEGER, single_punch INTEGER, "
+            "PRIMARY KEY (emp_code, date)) WITHOUT ROWID"
+        )
+        connection.executemany(
+            "INSERT INTO summary VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((record['emp_code'], date, record['first_punch'], record['last_punch'], record['total_punches'],
+              record['working_hours'], record['late_entry'], record['early_exit'], record['single_punch'])
+             for date, records in summary.items() for record in records)
+        )
+        connection.execute("CREATE INDEX summary_date ON summary (date, emp_code)")
+        connection.execute(
+            "CREATE TABLE rollup (type TEXT, emp_code TEXT, start TEXT, end TEXT, period TEXT, days INTEGER, total_punches INTEGER, "
+            "worked_minutes INTEGER, late_entries INTEGER, early_exits INTEGER, single_punches INTEGER, "
+            "PRIMARY KEY (type, emp_code, start)) WITHOUT ROWID"
+        )
+        periods = rollups.periods if rollups is not None else []
+        for period in periods:
+            connection.executemany(
+                "INSERT INTO rollup VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((period, record['emp_code'], record['start'], record['end'], record['period'], *(record[field] for field in ROLLUP_FIELDS))
+                 for record in rollups.records(period))
+            )
+        connection.execute("INSERT INTO meta VALUES ('signature', ?)", (signature,))
+        connection.execute("INSERT INTO meta VALUES ('periods', ?)", (json.dumps(periods),))
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmp_path, filepath)
+
+
+def open_summary_store(log_folder: str = LOG_FOLDER, output_folder: str = OUTPUT_FOLDER, output_file: str = SUMMARY_DB_FILE) -> 'SummaryStore':
+    filepath = os.path.join(output_folder, output_file)
+    if not os.path.exists(filepath):
+        return None
+
+    try:
+        store = SummaryStore(filepath)
+    except sqlite3.Error:
+        return None
+    if store.signature() != log_folder_signature(log_folder):
+        store.close()
+        return None
+    return store
+
+
+class SummaryStore:
+    #Read side of the summary database written by save_summary_store
+    def __init__(self, filepath: str):
+        self.connection = sqlite3.connect(f"file:{filepath}?mode=ro", uri=True)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def signature(self) -> str:
+        try:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def periods(self) -> List[str]:
+        try:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'periods'").fetchone()
+        except sqlite3.Error:
+            return []
+        return json.loads(row[0]) if row else []
+
+    def rollup(self, period: str, emp_code: str, date: str = None) -> List[Dict]:
+        fields = ['type', 'period', 'start', 'end', 'emp_code'] + ROLLUP_FIELDS
+        query = f"SELECT {', '.join(fields)} FROM rollup WHERE type = ? AND emp_code = ?"
+        params = (period, emp_code)
+        if date:
+            query += " AND start <= ? AND end >= ?"
+            params += (date, date)
+        return [dict(zip(fields, row)) for row in self.connection.execute(query + " ORDER BY start", params)]
+
+    def dated_records(self, where: str, params: Tuple) -> List[Dict]:
+        query = f"SELECT date, {', '.join(SUMMARY_FIELDS)} FROM summary WHERE {where}"
+        return [{'date': row[0], **dict(zip(SUMMARY_FIELDS, row[1:]))} for row in self.connection.execute(query, params)]
+
+    def employee(self, emp_code: str) -> List[Dict]:
+        return self.dated_records("emp_code = ? ORDER BY date", (emp_code,))
+
+    def date(self, date: str) -> List[Dict]:
+        query = f"SELECT {', '.join(SUMMARY_FIELDS)} FROM summary WHERE date = ? ORDER BY emp_code"
+        return [dict(zip(SUMMARY_FIELDS, row)) for row in self.connection.execute(query, (date,))]
+
+    def employee_and_date(self, emp_code: str, date: str) -> Dict:
+        records = self.dated_records("emp_code = ? AND date = ?", (emp_code, date))
+        return records[0] if records else {}
+
+    def date_range(self, emp_code: str, start_date: str, end_date: str) -> List[Dict]:
+        return self.dated_records("emp_code = ? AND date >= ? AND date <= ? ORDER BY date", (emp_code, start_date, end_date))
+
+    def subset(self, emp_codes: Iterable[str], dates: Iterable[str]) -> Dict:
+        #Summary dict holding every record of the given employees and dates
+        rows = {}
+        for emp_code in emp_codes:
+            for record in self.employee(emp_code):
+                rows[(record['date'], emp_code)] = record
+        for date in dates:
+            for record in self.date(date):
+                rows.setdefault((date, record['emp_code']), record)
+
+        summary = {}
+        for (date, _), record in sorted(rows.items()):
+            summary.setdefault(date, []).append({field: record[field] for field in SUMMARY_FIELDS})
+        return summary
+
+
+def search_attendance(attendance_data: PunchStore, emp_code:str, date:str = None) -> List[Dict]:
+    if emp_code not in attendance_data:
+        return []
+
+    records = []
+    emp_start, emp_end = attendance_data.employee_range(emp_code)
+    ts = attendance_data.ts
+
+    for _, day, start, end in attendance_data.day_groups(emp_start, emp_end):
+        if date and day_to_date_key(day) != date:
+            continue
+
+        first_punch = ts[start]
+        last_punch = ts[end - 1]
+
+        duration = last_punch - first_punch
+        hours = duration / 3600
+        work_hours = round(hours, 2)
+
+        records.append({
+            'emp_code': emp_code,
+            'first_punch': format_clock(first_punch),
+            'last_punch': format_clock(last_punch),
+            'total_punches': end - start,
+            'working_hours': work_hours,
+            'late_entry': 1 if first_punch - day * SECONDS_PER_DAY > LATE_THRESHOLD_SECONDS else 0,
+            'early_exit': 1 if last_punch - day * SECONDS_PER_DAY < EARLY_THRESHOLD_SECONDS else 0
+        })
+
+    return records
+
+class SummaryIndex:
+    #Lookup tables over calculate_summary output, built once and shared by every search
+    def __init__(self, summary: Dict, rollups: PeriodRollups = None):
+        self.summary = summary
+        self.rollups = rollups
+        self.employee_dates = defaultdict(list)
+        self.employee_records = defaultdict(list)
+        self.records = {}
+        self.date_records = {}
+
+        for date in sorted(summary.keys()):
+            records = summary[date]
+            self.date_records[date] = sorted(records, key=lambda x: x['emp_code'])
+            for record in records:
+                emp_code = record['emp_code']
+                self.employee_dates[emp_code].append(date)
+                self.employee_records[emp_code].append(record)
+                self.records.setdefault((emp_code, date), record)
+
+    def dated_records(self, emp_code: str, start: int = 0, end: int = None) -> List[Dict]:
+        dates = self.employee_dates.get(emp_code, [])
+        records = self.employee_records.get(emp_code, [])
+        end = len(dates) if end is None else end
+        return [{'date': dates[i], **records[i]} for i in range(start, end)]
+
+    def employee(self, emp_code: str) -> List[Dict]:
+        return self.dated_records(emp_code)
+
+    def date(self, date: str) -> List[Dict]:
+        return list(self.date_records.get(date, []))
+
+    def employee_and_date(self, emp_code: str, date: str) -> Dict:
+        record = self.records.get((emp_code, date))
+        if record is None:
+            return {}
+        return {'date': date, **record}
+
+    def date_range(self, emp_code: str, start_date: str, end_date: str) -> List[Dict]:
+        dates = self.employee_dates.get(emp_code, [])
+        start = bisect_left(dates, start_date)
+        end = bisect_right(dates, end_date)
+        return self.dated_records(emp_code, start, max(start, end))
+
+    def rollup(self, period: str, emp_code: str, date: str = None) -> List[Dict]:
+        if self.rollups is None or period not in self.rollups.periods:
+            return summary_rollups(self.summary, period, emp_code).records(period, emp_code, date)
+        return self.rollups.records(period, emp_code, date)
+
+
+def summary_rollups(summary: Dict, period: str, emp_code: str = None) -> PeriodRollups:
+    #Totals a period straight from calculate_summary output, for lookups that were not handed PeriodRollups
+    if parse_period(period) is None:
+        raise ValueError(f"invalid period '{period}'")
+    rollups = PeriodRollups([period])
+    rollups.add_summary(summary, emp_code)
+    return rollups
+
+#A plain summary dict is scanned as it is, since callers may change it between searches; build a SummaryIndex once for repeated lookups
+def search_summary_by_employee(summary: Dict, emp_code: str) -> List[Dict]:
+    if isinstance(summary, (SummaryIndex, SummaryStore)):
+        return summary.employee(emp_code)
+    results = []
+    for date in sorted(summary.keys()):
+        for record in summary[date]:
+            if record['emp_code'] == emp_code:
+                results.append({
+                    'date': date,
+                    **record
+                })
+    return results
+
+def search_summary_by_date(summary: Dict, date: str) -> List[Dict]:
+    if isinstance(summary, (SummaryIndex, SummaryStore)):
+        return summary.date(date)
+    if date not in summary:
+        return []
+    return sorted(summary[date], key=lambda x: x['emp_code'])
+
+def search_summary_by_employee_and_date(summary: Dict, emp_code: str, date: str) -> Dict:
+    if isinstance(summary, (SummaryIndex, SummaryStore)):
+        return summary.employee_and_date(emp_code, date)
+    if date not in summary:
+        return {}
+    for record in summary[date]:
+        if record['emp_code'] == emp_code:
+            return {
+                'date': date,
+                **record
+            }
+    return {}
+
+def search_summary_by_date_range(summary: Dict, emp_code: str, start_date: str, end_date: str) -> List[Dict]:
+    if isinstance(summary, (SummaryIndex, SummaryStore)):
+        return summary.date_range(emp_code, start_date, end_date)
+    results = []
+    for date in sorted(summary.keys()):
+        if start_date <= date <= end_date:
+            for record in summary[date]:
+                if record['emp_code'] == emp_code:
+                    results.append({
+                        'date': date,
+                        **record
+                    })
+    return results
+
+def search_summary_by_rollup(summary: Dict, emp_code: str, period: str, date: str = None) -> List[Dict]:
+    if isinstance(summary, (SummaryIndex, SummaryStore)):
+        return summary.rollup(period, emp_code, date)
+    return summary_rollups(summary, period, emp_code).records(period, emp_code, date)
+
+def export_search_results_json(results: List[Dict], output_folder: str = OUTPUT_FOLDER, output_file: str='search_results.json') -> None:
+    os.makedirs(output_folder, exist_ok=True)
+    filepath = os.path.join(output_folder, output_file)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=4)
+
+def export_search_results_excel(results: List[Dict], output_folder: str = OUTPUT_FOLDER, output_file: str='search_results.xlsx') -> None:
+    os.makedirs(output_folder, exist_ok=True)
+    filepath = os.path.join(output_folder, output_file)
+
+    if not results:
+        import openpyxl
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = 'Search Results'
+        ws.cell(row=1, column=1, value='No results found.')
+        wb.save(filepath)
+        print(f"Search results saved to '{filepath}'.")
+        return
+
+    def rows():
+        for record in results:
+            yield excel_row(record.get('date', ''), record)
+
+    write_excel_report(filepath, 'Search Results', rows)
+
+def search_by_employee_code(summary: Dict, emp_code: str, excel: bool = True) -> None:
+    results = search_summary_by_employee(summary, emp_code)
+    if results:
+        export_search_results_json(results, output_file=f'search_emp_{emp_code}.json')
+        if excel:
+            export_search_results_excel(results, output_file=f'search_emp_{emp_code}.xlsx')
+    else:
+        print(f"No results found for employee code '{emp_code}'.")
+
+def search_by_date(summary: Dict, date: str, excel: bool = True) -> None:
+    results = search_summary_by_date(summary, date)
+    if results:
+        export_search_results_json(results, output_file=f'search_date_{date}.json')
+        if excel:
+            export_search_results_excel(results, output_file=f'search_date_{date}.xlsx')
+    else:
+        print(f"No result found for date '{date}'.")
+
+def search_by_employee_and_date(summary: Dict, emp_code: str, date: str, excel: bool = True) -> None:
+    result = search_summary_by_employee_and_date(summary, emp_code, date)
+    if result:
+        export_search_results_json([result], output_file=f'search_emp_{emp_code}_date_{date}.json')
+        if excel:
+            export_search_results_excel([result], output_file=f'search_emp_{emp_code}_date_{date}.xlsx')
+    else:
+        print(f"No results found for employee code '{emp_code}' and date '{date}'.")
+
+def search_by_date_range(summary: Dict, emp_code: str, start_date: str, end_date: str, excel: bool = True) -> None:
+    results = search_summary_by_date_range(summary, emp_code, start_date, end_date)
+    if results:
+        export_search_results_json(results, output_file=f'search_emp_{emp_code}_{start_date}_to_{end_date}.json')
+        if excel:
+            export_search_results_excel(results, output_file=f'search_emp_{emp_code}_{start_date}_to_{end_date}.xlsx')
+    else:
+        print(f"No results found for employee {emp_code} from {start_date} to {end_date}")
+
+def search_by_rollup(summary: Dict, emp_code: str, period: str, date: str = None, excel: bool = True) -> None:
+    results = search_summary_by_rollup(summary, emp_code, period, date)
+    suffix = f'{emp_code}_{period}_{date}' if date else f'{emp_code}_{period}'
+    if results:
+        export_search_results_json(results, output_file=f'search_rollup_{suffix}.json')
+        if excel:
+            save_rollup_excel(results, output_file=f'search_rollup_{suffix}.xlsx', title='Search Results')
+    else:
+        print(f"No {period} totals found for employee code '{emp_code}'.")
+
+def read_query_file(filepath: str) -> List[Tuple]:
+    queries = []
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            if filepath.endswith('.csv'):
+                rows = list(enumerate(csv.DictReader(f), start=2))
+            else:
+                rows = [(line_num, decode_query_line(line)) for line_num, line in enumerate(f, start=1) if line.strip()]
+    except Exception as e:
+        print(f"Error reading query file '{filepath}': {str(e)}")
+        return queries
+
+    for line_num, fields in rows:
+        query = parse_query(fields)
+        if query is None:
+            print(f"Error: query on line {line_num} in '{filepath}' is invalid and was skipped.")
+        elif query not in queries:
+            queries.append(query)
+    return queries
+
+def decode_query_line(line: str) -> Dict:
+    #A malformed line is skipped on its own instead of failing the whole file
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+def parse_query(fields: Dict) -> Tuple:
+    if not isinstance(fields, dict):
+        return None
+
+    search_type = str(fields.get('type') or '').strip()
+    if search_type not in QUERY_FIELDS:
+        return None
+
+    values = []
+    for name in QUERY_FIELDS[search_type]:
+        value = str(fields.get(name) or '').strip()
+        if not value:
+            return None
+        values.append(value if name == 'emp_code' else unix_to_date(value))
+    return (search_type, *values)
+
+def batch_lookup(lookup, queries: List[Tuple]) -> SummaryIndex:
+    #Queries share one index; from the store only the employees and dates they touch are loaded
+    if isinstance(lookup, SummaryIndex):
+        return lookup
+    if isinstance(lookup, SummaryStore):
+        emp_codes = {query[1] for query in queries if query[0] != 'date'}
+        dates = {query[1] for query in queries if query[0] == 'date'}
+        return SummaryIndex(lookup.subset(emp_codes, dates))
+    return SummaryIndex(lookup)
+
+def query_results(lookup, query: Tuple) -> List[Dict]:
+    if query[0] == 'employee':
+        return lookup.employee(query[1])
+    if query[0] == 'date':
+        return [{'date': query[1], **record} for record in lookup.date(query[1])]
+    if query[0] == 'employee_and_date':
+        result = lookup.employee_and_date(query[1], query[2])
+        return [result] if result else []
+    return lookup.date_range(query[1], query[2], query[3])
+
+def run_batch(lookup, query_file: str, combined: bool = False, output_folder: str = OUTPUT_FOLDER, excel: bool = True) -> None:
+    queries = read_query_file(query_file)
+    if not queries:
+        print(f"No valid queries found in '{query_file}'.")
+        return
+
+    index = batch_lookup(lookup, queries)
+    if not combined:
+        for query in queries:
+            run_search(index, query, excel)
+        print(f"Answered {len(queries)} queries from '{query_file}'.")
+        return
+
+    answers = [(query, query_results(index, query)) for query in queries]
+
+    os.makedirs(output_folder, exist_ok=True)
+    json_path = os.path.join(output_folder, 'batch_results.json')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump([{
+            'query': {'type': query[0], **dict(zip(QUERY_FIELDS[query[0]], query[1:]))},
+            'results': results
+        } for query, results in answers], f, indent=4)
+
+    def rows():
+        for query, results in answers:
+            label = ' '.join(query)
+            for record in results:
+                yield [label] + excel_row(record.get('date', ''), record)
+
+    if excel:
+        write_excel_report(os.path.join(output_folder, 'batch_results.xlsx'), 'Batch Results', rows, ['Query'] + EXCEL_HEADER)
+    print(f"Answered {len(queries)} queries from '{query_file}', results saved to '{json_path}'.")
+
+def unix_to_date(unix_timestamp: str) -> str:
+    try:
+        timestamp_int = int(unix_timestamp)
+        if 946684800 <= timestamp_int <= 4102444800:
+            dt = datetime.fromtimestamp(timestamp_int)
+            return dt.date().isoformat()
+    except:
+        pass
+    return unix_timestamp
+
+def parse_options(args: List[str]) -> Tuple[Dict, List[str]]:
+    options = {'incremental': False, 'workers': 1, 'batch': None, 'combined': False, 'follow': False, 'metrics': None, 'profile': None, 'error_samples': ERROR_SAMPLE_LIMIT, 'shard': False, 'shard_prefix': 0, 'dedup': 'set', 'pipeline': False, 'rollup': False, 'periods': [], 'excel': True}
+    remaining = []
+
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '--incremental':
+            options['incremental'] = True
+        elif arg == '--workers':
+            if i + 1 < len(args) and args[i + 1].isdigit() and int(args[i + 1]) > 0:
+                options['workers'] = int(args[i + 1])
+                i += 1
+            else:
+                print("Error: --workers requires a positive number of processes. Using 1.")
+        elif arg == '--batch':
+            if i + 1 < len(args):
+                options['batch'] = args[i + 1]
+                i += 1
+            else:
+                print("Error: --batch requires a query file (.jsonl or .csv).")
+        elif arg == '--combined':
+            options['combined'] = True
+        elif arg == '--no-excel':
+            options['excel'] = False
+        elif arg == '--follow':
+            options['follow'] = True
+        elif arg == '--dedup':
+            if i + 1 < len(args) and args[i + 1] in DEDUP_ENGINES:
+                options['dedup'] = args[i + 1]
+                i += 1
+            else:
+                print(f"Error: --dedup requires an engine: {', '.join(DEDUP_ENGINES)}. Using set.")
+        elif arg == '--pipeline':
+            options['pipeline'] = True
+        elif arg == '--shard':
+            options['shard'] = True
+        elif arg == '--shard-prefix':
+            if i + 1 < len(args) and args[i + 1].isdigit() and int(args[i + 1]) > 0:
+                options['shard'] = True
+                options['shard_prefix'] = int(args[i + 1])
+                i += 1
+            else:
+                print("Error: --shard-prefix requires a positive number of emp_code characters.")
+        elif arg == '--rollup':
+            options['rollup'] = True
+        elif arg == '--period':
+            if i + 1 < len(args) and parse_period(args[i + 1]) is not None:
+                options['rollup'] = True
+                if args[i + 1] not in options['periods']:
+                    options['periods'].append(args[i + 1])
+                i += 1
+            else:
+                print("Error: --period requires a length such as 14d or 14d@2025-01-06.")
+        elif arg == '--error-samples':
+            if i + 1 < len(args) and args[i + 1].isdigit():
+                options['error_samples'] = int(args[i + 1])
+                i += 1
+            else:
+                print("Error: --error-samples requires a number.")
+        elif arg == '--metrics':
+            if i + 1 < len(args) and not args[i + 1].startswith('--'):
+                options['metrics'] = args[i + 1]
+                i += 1
+            else:
+                options['metrics'] = os.path.join(OUTPUT_FOLDER, METRICS_FILE)
+        elif arg == '--profile':
+            if i + 1 < len(args) and args[i + 1] in PIPELINE_STAGES:
+                options['profile'] = args[i + 1]
+                i += 1
+            else:
+                print(f"Error: --profile requires a stage: {', '.join(PIPELINE_STAGES)}.")
+        else:
+            remaining.append(arg)
+        i += 1
+
+    return options, remaining
+
+def parse_arguments():
+    args = parse_options(sys.argv[1:])[1]
+
+    if not args:
+        return None
+
+    if args[0] == '--search':
+        if len(args) < 2:
+            print("Error: --search requires a search type.")
+            return None
+
+        search_type = args[1]
+
+        if search_type == 'employee':
+            if len(args) < 3:
+                print("Error: --search employee requires an employee code.")
+                return None
+            emp_code = args[2]
+            return ('employee', emp_code)
+
+        elif search_type == 'date':
+            if len(args) < 3:
+                print("Error: --search date requires a date (YYYY-MM-DD or Unix timestamp).")
+                return None
+            date_input = args[2]
+            date = unix_to_date(date_input)
+            return ('date', date)
+
+        elif search_type == 'employee_and_date':
+            if len(args) < 4:
+                print("Error: --search employee_and_date requires an employee code and a date (YYYY-MM-DD or Unix timestamp).")
+                return None
+            emp_code = args[2]
+            date_input = args[3]
+            date = unix_to_date(date_input)
+            return ('employee_and_date', emp_code, date)
+
+        elif search_type == 'date_range':
+            if len(args) < 5:
+                print("Error: --search date_range requires an employee code, start date, and end date (YYY-MM-DD).")
+                return None
+            emp_code = args[2]
+            start_date_input = args[3]
+            end_date_input = args[4]
+            start_date = unix_to_date(start_date_input)
+            end_date = unix_to_date(end_date_input)
+            return ('date_range', emp_code, start_date, end_date)
+
+        elif search_type == 'rollup':
+            if len(args) < 4 or parse_period(args[3]) is None:
+                print("Error: --search rollup requires an employee code and a period (week, month or <days>d[@YYYY-MM-DD]), optionally followed by a date.")
+                return None
+            emp_code = args[2]
+            period = args[3]
+            date = unix_to_date(args[4]) if len(args) > 4 else None
+            try:
+                if date is not None:
+                    date_to_day(date)
+            except ValueError:
+                print(f"Error: Invalid date '{date}'. Use YYYY-MM-DD or a Unix timestamp.")
+                return None
+            return ('rollup', emp_code, period, date)
+        else:
+            print(f"Error: Invalid search type '{search_type}'.")
+            print("Valid search types: employee, date, employee_and_date, date_range, rollup")
+            return None
+    else:
+        print(f"Error: Invalid search option '{args[0]}'.")
+        print("Usage: ")
+        print("python process_attendance.py --search employee <emp_code>")
+        print("python process_attendance.py --search date <date>")
+        print("python process_attendance.py --search employee_and_date <emp_code> <date>")
+        print("python process_attendance.py --search date_range <emp_code> <start_date> <end_date>")
+        print("python process_attendance.py --search rollup <emp_code> <week|month|<days>d[@start]> [<date>]")
+        print("python process_attendance.py --batch <queries.jsonl|queries.csv> [--combined]")
+        print("python process_attendance.py --follow")
+        print("Options: --incremental, --workers <N>, --dedup <set|packed|sort|disk>, --pipeline, --shard, --shard-prefix <N>, --rollup, --period <days>d[@start], --no-excel, --error-samples <N>, --metrics [file.json|file.prom], --profile <stage>")
+        return None
+
+def summary_record(emp_code: str, day: int, first_punch: int, last_punch: int, total_punches: int) -> Dict:
+    _, work_minutes, late_entry, early_exit, single_punch = day_totals(day, first_punch, last_punch, total_punches)
+    return {
+        'emp_code': emp_code,
+        'first_punch': format_clock(first_punch),
+        'last_punch': format_clock(last_punch),
+        'total_punches': total_punches,
+        'working_hours': CLOCK_LABELS[work_minutes],
+        'late_entry': late_entry,
+        'early_exit': early_exit,
+        'single_punch': single_punch
+    }
+
+class SummaryTracker:
+    #Keeps calculate_summary output current while punches are appended to a PunchStore
+    def __init__(self, attendance_data: PunchStore, periods: List[str] = None):
+        columns = summary_columns(attendance_data)
+        self.summary = summary_from_columns(columns, attendance_data.employees)
+        self.rollups = None
+        if periods:
+            self.rollups = PeriodRollups(periods)
+            self.rollups.add_columns(columns, attendance_data.employees)
+        self.records = {(record['emp_code'], date): record for date, records in self.summary.items() for record in records}
+        self.groups = {}
+        ts = attendance_data.ts
+        for emp_id, day, start, end in attendance_data.day_groups():
+            self.groups[(attendance_data.employees[emp_id], day)] = [ts[start], ts[end - 1], end - start]
+        self.seen = len(attendance_data)
+
+    def update(self, attendance_data: PunchStore) -> int:
+        #Only the (employee, day) groups that received punches since the last call are rebuilt
+        #changed maps each touched group to its values before this call, for the rollups to withdraw
+        changed = {}
+        employees, emp, ts = attendance_data.employees, attendance_data.emp, attendance_data.ts
+        for i in range(self.seen, len(attendance_data)):
+            emp_code = employees[emp[i]]
+            seconds = ts[i]
+            key = (emp_code, seconds // SECONDS_PER_DAY)
+            group = self.groups.get(key)
+            if key not in changed:
+                changed[key] = tuple(group) if group is not None else None
+            if group is None:
+                self.groups[key] = [seconds, seconds, 1]
+            else:
+                group[0] = min(group[0], seconds)
+                group[1] = max(group[1], seconds)
+                group[2] += 1
+        self.seen = len(attendance_data)
+
+        for (emp_code, day), previous in changed.items():
+            first_punch, last_punch, total_punches = self.groups[(emp_code, day)]
+            self.apply(summary_record(emp_code, day, first_punch, last_punch, total_punches), day_to_date_key(day))
+            if self.rollups is not None:
+                if previous is not None:
+                    self.rollups.add_day(emp_code, day, day_totals(day, *previous), -1)
+                self.rollups.add_day(emp_code, day, day_totals(day, first_punch, last_punch, total_punches))
+        return len(changed)
+
+    def apply(self, record: Dict, date: str) -> None:
+        existing = self.records.get((record['emp_code'], date))
+        if existing is not None:
+            existing.update(record)
+            return
+
+        records = self.summary.setdefault(date, [])
+        position = bisect_right([other['emp_code'] for other in records], record['emp_code'])
+        records.insert(position, record)
+        self.records[(record['emp_code'], date)] = record
+
+    def ordered_summary(self) -> Dict:
+        #Same key order as calculate_summary: dates appear in (lowest emp_code, date) order
+        return {date: self.summary[date] for date in sorted(self.summary, key=lambda date: (self.summary[date][0]['emp_code'], date))}
+
+class FolderWatcher:
+    #inotify wake-ups on Linux, plain polling everywhere else
+    def __init__(self, folder: str, poll_interval: float = FOLLOW_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self.fd = None
+        try:
+            import ctypes.util
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK)
+            if fd >= 0 and libc.inotify_add_watch(fd, os.fsencode(folder), INOTIFY_EVENTS) >= 0:
+                self.fd = fd
+            elif fd >= 0:
+                os.close(fd)
+        except (AttributeError, ImportError, OSError, TypeError):
+            self.fd = None
+
+    def wait(self, timeout: float) -> None:
+        if self.fd is None:
+            timer.sleep(min(timeout, self.poll_interval))
+            return
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            try:
+                while os.read(self.fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+def stop_following(signum, frame):
+    raise KeyboardInterrupt
+
+def follow_attendance(log_folder: str = LOG_FOLDER, output_folder: str = OUTPUT_FOLDER, flush_interval: float = FOLLOW_FLUSH_INTERVAL, periods: List[str] = None) -> None:
+    attendance_data, processed_records, checkpoints = load_ingest_state(output_folder)
+    error_log = ErrorLog(os.path.join(output_folder, ERROR_RECORDS_FILE))
+    reported_errors = 0
+
+    def scan() -> Dict:
+        if not os.path.exists(log_folder):
+            return checkpoints
+        files = [f for f in os.listdir(log_folder) if is_log_file(f)]
+        return ingest_new_lines(log_folder, files, checkpoints, attendance_data, error_log, processed_records)
+
+    checkpoints = scan()
+    tracker = SummaryTracker(attendance_data, periods)
+    watcher = FolderWatcher(log_folder)
+    previous_sigterm = signal.signal(signal.SIGTERM, stop_following)
+    print(f"Following '{log_folder}'. Press Ctrl+C to stop.")
+
+    dirty = True
+    last_flush = 0
+    last_state_save = timer.monotonic()
+    try:
+        while True:
+            now = timer.monotonic()
+            if dirty and now - last_flush >= flush_interval:
+                save_json_summary(tracker.ordered_summary(), output_folder)
+                if tracker.rollups is not None:
+                    save_rollup_report(tracker.rollups, output_folder, excel=False)
+                if len(error_log) != reported_errors:
+                    save_error_log(error_log, output_folder)
+                    reported_errors = len(error_log)
+                dirty = False
+                last_flush = now
+            if now - last_state_save >= FOLLOW_STATE_INTERVAL:
+                save_ingest_state(attendance_data, processed_records, checkpoints, output_folder)
+                last_state_save = now
+
+            watcher.wait(max(flush_interval - (timer.monotonic() - last_flush), 0) if dirty else FOLLOW_POLL_INTERVAL)
+            checkpoints = scan()
+            if tracker.update(attendance_data) or len(error_log) != reported_errors:
+                dirty = True
+    except KeyboardInterrupt:
+        print("\nStopping follow mode.")
+    finally:
+        #A second Ctrl+C or SIGTERM must not interrupt the final saves
+        previous_sigint = signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        try:
+            watcher.close()
+            save_json_summary(tracker.ordered_summary(), output_folder)
+            if tracker.rollups is not None:
+                save_rollup_report(tracker.rollups, output_folder, excel=False)
+            save_error_log(error_log, output_folder)
+            error_log.close()
+            save_ingest_state(attendance_data, processed_records, checkpoints, output_folder)
+        finally:
+            signal.signal(signal.SIGINT, previous_sigint)
+            signal.signal(signal.SIGTERM, previous_sigterm)
+
+def peak_rss_bytes() -> int:
+    #Lifetime high-water mark of this process or of its largest finished worker
+    if resource is None:
+        return None
+    scale = 1 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * scale
+
+def reset_stage_peak_rss() -> bool:
+    #Writing 5 to clear_refs resets VmHWM to the current RSS (Linux only)
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def stage_peak_rss_bytes() -> int:
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+def children_peak_rss_bytes() -> int:
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+class PipelineMetrics:
+    #Wall time, CPU time (worker processes included), rows/sec and peak RSS for each stage
+    def __init__(self, profile_stage: str = None, output_folder: str = OUTPUT_FOLDER):
+        self.stages = {}
+        self.profile_stage = profile_stage
+        self.output_folder = output_folder
+        #run_pipeline points this at the row_stats of the run's ErrorLog
+        self.row_stats = {}
+        #Writer stages overlap under --pipeline; the high-water mark is only reset when no other stage is open
+        self.lock = threading.Lock()
+        self.open_stages = 0
+        self.peak_reset = False
+
+    @contextmanager
+    def stage(self, name: str):
+        record = {'rows': None}
+        profiler = cProfile.Profile() if name == self.profile_stage else None
+        with self.lock:
+            if self.open_stages == 0:
+                self.peak_reset = reset_stage_peak_rss()
+            self.open_stages += 1
+        rss_started = peak_rss_bytes()
+        children_started = children_peak_rss_bytes()
+        started = timer.perf_counter()
+        cpu_started = sum(os.times()[:4])
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler:
+                profiler.disable()
+                os.makedirs(self.output_folder, exist_ok=True)
+                record['profile'] = os.path.join(self.output_folder, f'profile_{name}.prof')
+                profiler.dump_stats(record['profile'])
+
+            seconds = timer.perf_counter() - started
+            record['seconds'] = round(seconds, 6)
+            record['cpu_seconds'] = round(sum(os.times()[:4]) - cpu_started, 6)
+            record['rows_per_second'] = round(record['rows'] / seconds, 1) if record['rows'] is not None and seconds else None
+
+            #Peak RSS reached during this stage; worker processes count when one of them set a new high
+            peak = stage_peak_rss_bytes() if self.peak_reset else None
+            children = children_peak_rss_bytes()
+            if children > children_started:
+                peak = max(peak or 0, children)
+            record['peak_rss_bytes'] = peak
+            rss_ended = peak_rss_bytes()
+            record['rss_growth_bytes'] = rss_ended - rss_started if rss_ended is not None else None
+            with self.lock:
+                self.open_stages -= 1
+            self.stages[name] = record
+
+    def rows(self) -> Dict:
+        rejected = {name[len('rejected_'):]: count for name, count in sorted(self.row_stats.items()) if name.startswith('rejected_')}
+        return {
+            'accepted': self.row_stats.get('accepted', 0),
+            'deduplicated': self.row_stats.get('deduplicated', 0),
+            'rejected': sum(rejected.values()),
+            'rejected_by_rule': rejected,
+            'file_errors': self.row_stats.get('file_errors', 0)
+        }
+
+    def to_dict(self) -> Dict:
+        return {'created': datetime.now().isoformat(timespec='seconds'), 'stages': self.stages, 'rows': self.rows()}
+
+    def to_prometheus(self) -> str:
+        lines = []
+        gauges = [
+            ('seconds', 'attendance_stage_seconds', 'Wall time per pipeline stage.'),
+            ('cpu_seconds', 'attendance_stage_cpu_seconds', 'CPU time per pipeline stage, worker processes included.'),
+            ('rows_per_second', 'attendance_stage_rows_per_second', 'Rows handled per second by each stage.'),
+            ('peak_rss_bytes', 'attendance_stage_peak_rss_bytes', 'Peak resident set size reached during each stage.'),
+            ('rss_growth_bytes', 'attendance_stage_rss_growth_bytes', 'Growth of the process peak resident set size during each stage.')
+        ]
+        for key, metric, help_text in gauges:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+            lines += [f'{metric}{{stage="{name}"}} {record[key]}' for name, record in self.stages.items() if record[key] is not None]
+
+        rows = self.rows()
+        lines += ["# HELP attendance_rows Rows read in the last run by outcome.", "# TYPE attendance_rows gauge"]
+        lines += [f'attendance_rows{{result="{result}"}} {rows[result]}' for result in ('accepted', 'deduplicated', 'rejected')]
+        lines += ["# HELP attendance_rows_rejected Rows rejected in the last run by validation rule.", "# TYPE attendance_rows_rejected gauge"]
+        lines += [f'attendance_rows_rejected{{rule="{rule}"}} {count}' for rule, count in rows['rejected_by_rule'].items()]
+        lines += ["# HELP attendance_file_errors Files that could not be read in the last run.", "# TYPE attendance_file_errors gauge"]
+        lines += [f"attendance_file_errors {rows['file_errors']}"]
+        return '\n'.join(lines) + '\n'
+
+def save_metrics(metrics: PipelineMetrics, filepath: str) -> None:
+    #.prom files follow the Prometheus textfile format, anything else is JSON
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if filepath.endswith('.prom'):
+        content = metrics.to_prometheus()
+    else:
+        content = json.dumps(metrics.to_dict(), indent=4)
+    write_atomic(filepath, content.encode('utf-8'))
+    print(f"Metrics saved to '{filepath}'.")
+
+def run_search(summary: Dict, search_params: Tuple, excel: bool = True) -> None:
+    if search_params is None:
+        print("\nDefault report generated. No specific search performed.")
+    elif search_params[0] == 'employee':
+        search_by_employee_code(summary, search_params[1], excel=excel)
+    elif search_params[0] == 'date':
+        search_by_date(summary, search_params[1], excel=excel)
+    elif search_params[0] == 'employee_and_date':
+        search_by_employee_and_date(summary, search_params[1], search_params[2], excel=excel)
+    elif search_params[0] == 'date_range':
+        search_by_date_range(summary, search_params[1], search_params[2], search_params[3], excel=excel)
+    elif search_params[0] == 'rollup':
+        search_by_rollup(summary, search_params[1], search_params[2], search_params[3], excel=excel)
+    else:
+        print("Invalid search option.")
+
+def process_attendance():
+    options, _ = parse_options(sys.argv[1:])
+    if options['follow']:
+        follow_attendance(periods=rollup_periods(options) if options['rollup'] else None)
+        return
+
+    search_params = parse_arguments()
+    metrics = PipelineMetrics(options['profile'])
+    try:
+        run_pipeline(options, search_params, metrics)
+    finally:
+        if options['metrics']:
+            save_metrics(metrics, options['metrics'])
+
+def rollup_periods(options: Dict, search_params: Tuple = None) -> List[str]:
+    periods = ROLLUP_PERIODS + [period for period in options['periods'] if period not in ROLLUP_PERIODS]
+    if search_params is not None and search_params[0] == 'rollup' and search_params[2] not in periods:
+        periods.append(search_params[2])
+    return periods
+
+def run_writer(metrics: PipelineMetrics, name: str, write: Callable, rows: int) -> None:
+    with metrics.stage(name) as stage:
+        write()
+        stage['rows'] = rows
+
+def close_error_log(error_log: ErrorLog) -> None:
+    save_error_log(error_log)
+    error_log.close()
+
+def run_pipeline(options: Dict, search_params: Tuple, metrics: PipelineMetrics) -> None:
+    #Searches are answered from the summary store while the logs are unchanged and it holds the periods asked for
+    periods = rollup_periods(options, search_params)
+    if search_params is not None or options['batch']:
+        store = open_summary_store(LOG_FOLDER)
+        if store is not None and not set(periods) <= set(store.periods()):
+            store.close()
+            store = None
+        if store is not None:
+            try:
+                with metrics.stage('search'):
+                    if search_params is not None:
+                        run_search(store, search_params, options['excel'])
+                    if options['batch']:
+                        run_batch(store, options['batch'], options['combined'], excel=options['excel'])
+            finally:
+                store.close()
+            return
+
+    #Read Data
+    signature = log_folder_signature(LOG_FOLDER)
+    error_log = ErrorLog(os.path.join(OUTPUT_FOLDER, ERROR_RECORDS_FILE), options['error_samples'])
+    metrics.row_stats = error_log.row_stats
+    with metrics.stage('read') as stage:
+        if options['incremental']:
+            attendance_data, error_log, processed_records = read_log_files_incremental(LOG_FOLDER, error_log=error_log)
+        else:
+            attendance_data, error_log, processed_records = read_log_files(LOG_FOLDER, options['workers'], error_log, options['dedup'], options['pipeline'])
+        stage['rows'] = sum(count for name, count in error_log.row_stats.items() if name != 'file_errors')
+    if isinstance(processed_records, DiskRecordSet):
+        processed_records.close()
+    if not attendance_data:
+        with metrics.stage('save_error_log'):
+            save_error_log(error_log)
+            error_log.close()
+        return
+
+    #Calculate Summary
+    with metrics.stage('summary') as stage:
+        columns = summary_columns(attendance_data)
+        summary = summary_from_columns(columns, attendance_data.employees)
+        stage['rows'] = len(attendance_data)
+    summary_rows = sum(len(records) for records in summary.values())
+
+    with metrics.stage('rollup') as stage:
+        rollups = PeriodRollups(periods)
+        rollups.add_columns(columns, attendance_data.employees)
+        stage['rows'] = summary_rows
+    del columns
+
+    #Save all results
+    if options['shard']:
+        writers = [('save_shards', lambda: save_summary_shards(summary, options['shard_prefix'], options['workers']), summary_rows)]
+    else:
+        writers = [('save_json', lambda: save_json_summary(summary), summary_rows), ('save_excel', lambda: save_excel_summary(summary), summary_rows)]
+    if options['rollup']:
+        writers.append(('save_rollups', lambda: save_rollup_report(rollups), len(rollups)))
+    writers += [('save_store', lambda: save_summary_store(summary, signature, rollups=rollups), summary_rows), ('save_error_log', lambda: close_error_log(error_log), len(error_log))]
+    if options['pipeline']:
+        #The writers touch separate files, so they run side by side and their disk waits overlap
+        with concurrent_futures.ThreadPoolExecutor(max_workers=len(writers)) as executor:
+            futures = [executor.submit(run_writer, metrics, name, write, rows) for name, write, rows in writers]
+            for future in futures:
+                future.result()
+    else:
+        for name, write, rows in writers:
+            run_writer(metrics, name, write, rows)
+
+    #Search Function
+    with metrics.stage('search'):
+        index = SummaryIndex(summary, rollups)
+        if search_params is not None or not options['batch']:
+            run_search(index, search_params, options['excel'])
+        if options['batch']:
+            run_batch(index, options['batch'], options['combined'], excel=options['excel'])
+
+
+if __name__ == "__main__":
+    process_attendance()
@@ -0,0 +1,657 @@
+import os
+import io
+import sys
+import csv
+import gzip
+import bz2
+import lzma
+import zipfile
+import tarfile
+import json
+import pickle
+import random
+import shutil
+import statistics
+import subprocess
+import platform
+import tempfile
+import tracemalloc
+import time as timer
+from collections import defaultdict
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from array import array
+from typing import Callable, Dict, List
+
+import attendance_parser
+from attendance_parser import (
+    DEDUP_ENGINES, DISK_DEDUP_CACHE_KIB, ERROR_RECORDS_FILE, LOG_FOLDER, ROLLUP_PERIODS, TIMESTAMP_FORMATS, DeferredRecords, DiskRecordSet, ErrorLog, PeriodRollups, PipelineMetrics, PunchStore, SummaryIndex, TimestampParser, calculate_summary,
+    day_totals, load_snapshot, log_folder_signature, unique_punches, new_reader_state, parse_options, parse_timestamp, process_file, process_lines, read_log_files, run_pipeline,
+    search_summary_by_date_range, search_summary_by_employee_and_date,
+    save_excel_summary, save_json_summary, save_snapshot, save_summary_store, summary_columns
+)
+
+BENCHMARK_ROWS = 100000
+BENCHMARK_SEED = 42
+SUMMARY_SIZES = [1000000, 10000000]
+LOOKUP_QUERIES = 200
+WRAPPER_QUERIES = 600
+#A year of punches: 1000 employees, four punches on each of 365 days
+SNAPSHOT_PUNCHES = 1460000
+DEDUP_ROWS = 1000000
+ROLLUP_PUNCHES = 3000000
+ROLLUP_DAYS = 3 * 365
+STARTUP_RUNS = 21
+RESULTS_FILE = 'benchmark_results.json'
+PIPELINE_CONFIG = {
+    'employees': 500,
+    'days': 30,
+    'punches': 6,
+    'files': 4,
+    'csv': 0.5,
+    'formats': 'mixed',
+    'duplicates': 0.02,
+    'malformed': 0.01,
+    'workers': 1,
+    'output': RESULTS_FILE,
+    'compare': None
+}
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda']
+LAST_NAMES = ['Smith', 'Johnson', 'Brown', 'Garcia', 'Miller', 'Davis', 'Lopez', 'Wilson']
+
+
+def sample_datetimes(count: int) -> List[datetime]:
+    rng = random.Random(BENCHMARK_SEED)
+    start = datetime(2025, 1, 1)
+    return [start + timedelta(seconds=rng.randint(0, 365 * 86400)) for _ in range(count)]
+
+
+def sample_punches(count: int, employees: int = 1000) -> List[tuple]:
+    rng = random.Random(BENCHMARK_SEED)
+    devices = ['Device A', 'Device B', 'Device C']
+    return [(str(10000 + rng.randrange(employees)), dt, rng.choice(devices)) for dt in sample_datetimes(count)]
+
+
+def measure_memory(build: Callable) -> int:
+    tracemalloc.start()
+    try:
+        structure = build()
+        used = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del structure
+    return used
+
+
+def time_calls(func: Callable, values: List[str]) -> float:
+    started = timer.perf_counter()
+    for value in values:
+        func(value)
+    return timer.perf_counter() - started
+
+
+def benchmark_timestamps(count: int = BENCHMARK_ROWS) -> None:
+    datetimes = sample_datetimes(count)
+    epochs = [str(int(dt.timestamp())) for dt in datetimes]
+    samples = [('epoch', epochs), ('epoch (repeated)', [epochs[i % 1000] for i in range(count)])]
+    samples += [(fmt, [dt.strftime(fmt) for dt in datetimes]) for fmt in TIMESTAMP_FORMATS]
+
+    print(f"Timestamp parsing, {count} rows per format")
+    print(f"{'Format':<20}{'parse_timestamp':>18}{'TimestampParser':>18}{'Speedup':>10}")
+    for name, values in samples:
+        parser = TimestampParser()
+        assert [parser.parse(value) for value in values[:1000]] == [parse_timestamp(value) for value in values[:1000]]
+
+        baseline = time_calls(parse_timestamp, values)
+        parser = TimestampParser()
+        fast = time_calls(parser.parse, values)
+        print(f"{name:<20}{baseline:>17.3f}s{fast:>17.3f}s{baseline / fast:>9.1f}x")
+
+
+def benchmark_punch_store(count: int = BENCHMARK_ROWS) -> None:
+    punches = sample_punches(count)
+
+    def build_nested():
+        attendance_data = defaultdict(lambda: defaultdict(list))
+        for emp_code, dt, _ in punches:
+            #Fresh datetimes, as parsing creates one object per row
+            attendance_data[emp_code][dt.date().isoformat()].append(dt.replace())
+        return attendance_data
+
+    def build_records():
+        return {(emp_code, dt.timestamp(), device) for emp_code, dt, device in punches}
+
+    def build_store():
+        store = PunchStore()
+        for emp_code, dt, device in punches:
+            store.append(emp_code, dt, device)
+        return store
+
+    print(f"\nPunch storage, {count} punches")
+    for name, build in [('nested defaultdict', build_nested), ('processed_records', build_records), ('PunchStore', build_store)]:
+        used = measure_memory(build)
+        print(f"{name:<20}{used / 1024 / 1024:>10.1f} MB{used / count:>10.1f} B/punch")
+
+
+def benchmark_dedup(count: int = DEDUP_ROWS) -> None:
+    #Every engine behind the check-then-add pattern of process_row, with 5% of the rows repeated
+    rng = random.Random(BENCHMARK_SEED)
+    rows = [((emp_code + ' ')[:-1], dt.timestamp(), (device + ' ')[:-1], dt) for emp_code, dt, device in sample_punches(count)]
+    rows += [rng.choice(rows) for _ in range(count // 20)]
+    rng.shuffle(rows)
+
+    def run(engine: str):
+        attendance_data = PunchStore()
+        records = DEDUP_ENGINES[engine]()
+        for emp_code, stamp, device, dt in rows:
+            record_id = (emp_code, stamp, device)
+            if record_id in records:
+                continue
+            records.add(record_id)
+            attendance_data.append(emp_code, dt, device)
+        if isinstance(records, DeferredRecords):
+            records = unique_punches(attendance_data, records)
+        return attendance_data, records
+
+    print(f"\nDedup engines, {len(rows)} rows ({len(rows) - count} repeated), punch store included")
+    print(f"{'Engine':<10}{'Memory':>12}{'B/row':>8}{'Time':>10}{'Rows/s':>12}{'Punches':>10}")
+    for engine in DEDUP_ENGINES:
+        used = measure_memory(lambda: run(engine))
+        started = timer.perf_counter()
+        attendance_data, records = run(engine)
+        seconds = timer.perf_counter() - started
+        note = ''
+        if isinstance(records, DiskRecordSet):
+            note = f"  (+{os.path.getsize(records.path) / 1024 / 1024:.1f} MB on disk and up to {DISK_DEDUP_CACHE_KIB // 1024} MB of SQLite page cache)"
+            records.close()
+        print(f"{engine:<10}{used / 1024 / 1024:>10.1f}MB{used / len(rows):>8.1f}{seconds:>9.2f}s{len(rows) / seconds:>12.0f}{len(attendance_data):>10}{note}")
+
+
+def benchmark_log_reader(count: int = BENCHMARK_ROWS) -> None:
+    #The text reader against the byte reader process_file uses for whitespace .log files
+    rng = random.Random(BENCHMARK_SEED)
+    workdir = tempfile.mkdtemp(prefix='attendance_bench_')
+    filepath = os.path.join(workdir, 'sample.log')
+    try:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write("emp_code first_name last_name timestamp device\n")
+            for i, (emp_code, dt, device) in enumerate(sample_punches(count)):
+                name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+                f.write(f"{emp_code} {name}\n" if i % 100 == 99 else f"{emp_code} {name} {int(dt.timestamp())} {device}\n")
+
+        def read_text():
+            with open(filepath, 'r', encoding='utf-8') as f:
+                reader = new_reader_state(f.readline().strip())
+                f.seek(0)
+                process_lines(f, reader, filepath, PunchStore(), ErrorLog(), set())
+
+        def read_bytes():
+            process_file(filepath, PunchStore(), ErrorLog(), set())
+
+        timings = [min(time_calls(lambda _: read(), [None]) for _ in range(3)) for read in (read_text, read_bytes)]
+        print(f"\nWhitespace .log reader, {count} rows")
+        print(f"{'text':<12}{timings[0]:>10.3f}s{count / timings[0]:>12.0f} rows/s")
+        print(f"{'bytes':<12}{timings[1]:>10.3f}s{count / timings[1]:>12.0f} rows/s{timings[0] / timings[1]:>8.1f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def sample_store(count: int, employees: int = 2000, days: int = 365) -> PunchStore:
+    #Columns are filled directly, appending 10M parsed rows would dominate the run
+    rng = random.Random(BENCHMARK_SEED)
+    start = int(datetime(2025, 1, 1).timestamp())
+    store = PunchStore()
+    for emp_code in range(10000, 10000 + employees):
+        store.intern_employee(str(emp_code))
+    store.intern_device('Device A')
+    store.emp = array('I', (rng.randrange(employees) for _ in range(count)))
+    store.ts = array('q', (start + rng.randrange(days * 86400) for _ in range(count)))
+    store.dev = array('I', bytes(4 * count))
+    store.is_sorted = False
+    return store
+
+
+def benchmark_summary(sizes: List[int] = SUMMARY_SIZES) -> None:
+    numpy_module = attendance_parser.np
+    engines = [('pure Python', None)] + ([('NumPy', numpy_module)] if numpy_module is not None else [])
+
+    print("\ncalculate_summary (sort + group reductions + dict output)")
+    print(f"{'Punches':>10}" + ''.join(f"{name:>16}" for name, _ in engines) + f"{'Speedup':>10}")
+    try:
+        for count in sizes:
+            timings = []
+            for _, module in engines:
+                store = sample_store(count)
+                attendance_parser.np = module
+                started = timer.perf_counter()
+                calculate_summary(store)
+                timings.append(timer.perf_counter() - started)
+            speedup = f"{timings[0] / timings[-1]:>9.1f}x" if len(timings) > 1 else f"{'n/a':>10}"
+            print(f"{count:>10}" + ''.join(f"{seconds:>15.2f}s" for seconds in timings) + speedup)
+    finally:
+        attendance_parser.np = numpy_module
+
+
+def benchmark_rollups(count: int = ROLLUP_PUNCHES, days: int = ROLLUP_DAYS) -> None:
+    #Week and month rollups built from the summary columns of several years, then one more day added in place
+    numpy_module = attendance_parser.np
+    engines = [('pure Python', None)] + ([('NumPy', numpy_module)] if numpy_module is not None else [])
+    store = sample_store(count, 1000, days)
+    columns = summary_columns(store)
+    print(f"\nRollups ({', '.join(ROLLUP_PERIODS)}) over {len(columns['day'])} employee-days, {days // 365} years")
+    print(f"{'Engine':<14}{'Build':>10}{'Periods':>10}")
+    try:
+        for name, module in engines:
+            attendance_parser.np = module
+            rollups = PeriodRollups(ROLLUP_PERIODS)
+            started = timer.perf_counter()
+            rollups.add_columns(columns, store.employees)
+            seconds = timer.perf_counter() - started
+            print(f"{name:<14}{seconds:>9.3f}s{len(rollups):>10}")
+    finally:
+        attendance_parser.np = numpy_module
+
+    day = max(columns['day']) + 1
+    started = timer.perf_counter()
+    for emp_code in store.employees:
+        rollups.add_day(emp_code, day, day_totals(day, day * 86400 + 9 * 3600, day * 86400 + 18 * 3600, 2))
+    seconds = timer.perf_counter() - started
+    print(f"{'new day':<14}{seconds:>9.3f}s{len(store.employees):>10} employees")
+
+
+def benchmark_lookups(queries: int = LOOKUP_QUERIES) -> None:
+    summary = calculate_summary(sample_store(1000000))
+    index_started = timer.perf_counter()
+    index = SummaryIndex(summary)
+    index_seconds = timer.perf_counter() - index_started
+
+    rng = random.Random(BENCHMARK_SEED)
+    dates = sorted(summary.keys())
+    employees = sorted(index.employee_dates.keys())
+    lookups = []
+    for _ in range(queries):
+        start = rng.randrange(len(dates))
+        lookups.append((rng.choice(employees), dates[start], dates[min(start + 30, len(dates) - 1)]))
+
+    started = timer.perf_counter()
+    expected = [search_summary_by_date_range(summary, *lookup) for lookup in lookups]
+    scan_seconds = timer.perf_counter() - started
+
+    started = timer.perf_counter()
+    results = [index.date_range(*lookup) for lookup in lookups]
+    index_lookup_seconds = timer.perf_counter() - started
+    assert results == expected
+
+    rows = sum(len(records) for records in summary.values())
+    print(f"\nDate-range lookups, {queries} queries over {rows} summary rows (index built in {index_seconds:.2f}s)")
+    print(f"{'linear scan':<20}{queries / scan_seconds:>12.0f} lookups/s")
+    print(f"{'SummaryIndex':<20}{queries / index_lookup_seconds:>12.0f} lookups/s")
+
+    #Embedders call the search_summary_* wrappers with the summary dict itself, one lookup at a time
+    summary = calculate_summary(sample_store(3000, employees=30, days=30))
+    index = SummaryIndex(summary)
+    dates = sorted(summary.keys())
+    employees = sorted(index.employee_dates.keys())
+    lookups = []
+    for _ in range(WRAPPER_QUERIES):
+        start = rng.randrange(len(dates))
+        lookups.append((rng.choice(employees), dates[start], dates[min(start + 7, len(dates) - 1)]))
+
+    rows = sum(len(records) for records in summary.values())
+    print(f"\nsearch_summary_* wrappers, {WRAPPER_QUERIES} calls each over {rows} summary rows")
+    print(f"{'Wrapper':<38}{'dict':>10}{'SummaryIndex':>14}")
+    for name, search, arguments in [('search_summary_by_employee_and_date', search_summary_by_employee_and_date, [lookup[:2] for lookup in lookups]),
+                                    ('search_summary_by_date_range', search_summary_by_date_range, lookups)]:
+        timings = []
+        for lookup in (summary, index):
+            started = timer.perf_counter()
+            results = [search(lookup, *argument) for argument in arguments]
+            timings.append(timer.perf_counter() - started)
+            if lookup is summary:
+                expected = results
+            assert results == expected
+        print(f"{name:<38}{timings[0]:>9.3f}s{timings[1]:>13.3f}s")
+
+
+def benchmark_snapshot(count: int = SNAPSHOT_PUNCHES) -> None:
+    #The pickled ingest state the snapshot replaced, against saving and loading the snapshot
+    store = sample_store(count, employees=1000)
+    store.sort()
+    records = {(store.employees[emp_id], float(seconds), store.devices[device_id]) for emp_id, seconds, device_id in zip(store.emp, store.ts, store.dev)}
+    workdir = tempfile.mkdtemp(prefix='attendance_bench_')
+    try:
+        pickle_path = os.path.join(workdir, 'ingest_state.pkl')
+        snapshot_path = os.path.join(workdir, 'attendance_snapshot.bin')
+
+        def save_pickle():
+            with open(pickle_path, 'wb') as f:
+                pickle.dump({'attendance_data': store, 'processed_records': records}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        def load_pickle():
+            with open(pickle_path, 'rb') as f:
+                return pickle.load(f)
+
+        print(f"\nIngest state, {len(store)} punches and dedup records")
+        print(f"{'Format':<12}{'Size':>12}{'Save':>10}{'Load':>10}{'Lookup':>14}")
+        for name, save, load, path in [('pickle', save_pickle, load_pickle, pickle_path),
+                                       ('snapshot', lambda: save_snapshot(store, records, snapshot_path), lambda: load_snapshot(snapshot_path), snapshot_path)]:
+            save_seconds = time_calls(lambda _: save(), [None])
+            load_seconds = min(time_calls(lambda _: load(), [None]) for _ in range(3))
+            state = load()
+            loaded = state['processed_records'] if isinstance(state, dict) else state[1]
+            probes = list(records)[:LOOKUP_QUERIES * 50]
+            lookup_seconds = time_calls(loaded.__contains__, probes)
+            size = os.path.getsize(path)
+            print(f"{name:<12}{size / 1024 / 1024:>10.1f}MB{save_seconds:>9.3f}s{load_seconds:>9.3f}s{len(probes) / lookup_seconds:>10.0f}/s")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def generate_logs(folder: str, config: Dict) -> Dict:
+    #Whitespace .log files carry epoch timestamps (their timestamp is a single token), CSV files use the format mix
+    rng = random.Random(BENCHMARK_SEED)
+    os.makedirs(folder, exist_ok=True)
+    formats = ['epoch'] + TIMESTAMP_FORMATS if config['formats'] == 'mixed' else config['formats'].split(',')
+    csv_files = round(config['files'] * config['csv'])
+
+    handles = []
+    for i in range(config['files']):
+        is_csv = i < csv_files
+        handle = open(os.path.join(folder, f"device_{i}.{'csv' if is_csv else 'log'}"), 'w', encoding='utf-8', newline='')
+        if is_csv:
+            handle.write('emp_code,first_name,last_name,timestamp,device\n')
+        handles.append((handle, is_csv, rng.choice(formats) if is_csv else 'epoch', f"Device {i}"))
+
+    start = datetime(2025, 1, 1)
+    stats = {'rows': 0, 'duplicates': 0, 'malformed': 0}
+    try:
+        for day in range(config['days']):
+            for emp in range(config['employees']):
+                emp_code = str(10000 + emp)
+                first_name, last_name = FIRST_NAMES[emp % len(FIRST_NAMES)], LAST_NAMES[emp % len(LAST_NAMES)]
+                for _ in range(config['punches']):
+                    handle, is_csv, fmt, device = rng.choice(handles)
+                    dt = start + timedelta(days=day, seconds=rng.randint(7 * 3600, 20 * 3600))
+                    timestamp = str(int(dt.timestamp())) if fmt == 'epoch' else dt.strftime(fmt)
+                    fields = [emp_code, first_name, last_name, timestamp, device]
+
+                    if rng.random() < config['malformed']:
+                        broken = rng.randrange(4)
+                        if broken == 0:
+                            fields = fields[:3]
+                        elif broken == 1:
+                            fields[0] += '!'
+                        elif broken == 2:
+                            fields[1] += '1'
+                        else:
+                            fields[3] = 'not-a-time'
+                        stats['malformed'] += 1
+
+                    line = (','.join(fields) if is_csv else ' '.join(fields)) + '\n'
+                    handle.write(line)
+                    stats['rows'] += 1
+                    if rng.random() < config['duplicates']:
+                        handle.write(line)
+                        stats['rows'] += 1
+                        stats['duplicates'] += 1
+    finally:
+        for handle, _, _, _ in handles:
+            handle.close()
+    return stats
+
+
+def collect_timestamps(folder: str) -> List[List[str]]:
+    timestamps = []
+    for file in sorted(os.listdir(folder)):
+        with open(os.path.join(folder, file), 'r', encoding='utf-8') as f:
+            if file.endswith('.csv'):
+                timestamps.append([row['timestamp'] or '' for row in csv.DictReader(f)])
+            else:
+                timestamps.append([line.split()[3] for line in f if len(line.split()) > 3])
+    return timestamps
+
+
+def run_stage(name: str, func: Callable, rows: int, results: Dict):
+    with redirect_stdout(io.StringIO()):
+        started = timer.perf_counter()
+        cpu_started = timer.process_time()
+        value = func()
+        seconds = timer.perf_counter() - started
+        cpu_seconds = timer.process_time() - cpu_started
+
+        #A second, traced run gives the stage's peak allocation without slowing the timed run
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    results[name] = {
+        'seconds': round(seconds, 4),
+        'cpu_seconds': round(cpu_seconds, 4),
+        'rows_per_second': round(rows / seconds) if seconds else None,
+        'peak_mb': round(peak / 1024 / 1024, 2)
+    }
+    print(f"{name:<22}{seconds:>10.3f}s{results[name]['peak_mb']:>12.1f} MB")
+    return value
+
+
+def benchmark_pipeline(config: Dict) -> Dict:
+    workdir = tempfile.mkdtemp(prefix='attendance_bench_')
+    log_folder = os.path.join(workdir, 'attendance_logs')
+    output_folder = os.path.join(workdir, 'attendance_reports')
+    try:
+        stats = generate_logs(log_folder, config)
+        print(f"\nPipeline, {stats['rows']} rows ({stats['duplicates']} duplicates, {stats['malformed']} malformed) in {config['files']} files")
+        print(f"{'Stage':<22}{'Time':>11}{'Peak':>15}")
+
+        stages = {}
+        rows = stats['rows']
+        timestamps = collect_timestamps(log_folder)
+
+        def parse_all():
+            for file_timestamps in timestamps:
+                parser = TimestampParser()
+                for timestamp in file_timestamps:
+                    parser.parse(timestamp)
+
+        def read_all():
+            error_log = ErrorLog(os.path.join(output_folder, ERROR_RECORDS_FILE))
+            attendance_data = read_log_files(log_folder, config['workers'], error_log)[0]
+            error_log.close()
+            return attendance_data
+
+        attendance_data = run_stage('read_log_files', read_all, rows, stages)
+        run_stage('parse_timestamp', parse_all, rows, stages)
+        summary = run_stage('calculate_summary', lambda: calculate_summary(attendance_data), len(attendance_data), stages)
+        summary_rows = sum(len(records) for records in summary.values())
+        run_stage('save_json_summary', lambda: save_json_summary(summary, output_folder), summary_rows, stages)
+        run_stage('save_excel_summary', lambda: save_excel_summary(summary, output_folder), summary_rows, stages)
+        signature = log_folder_signature(log_folder)
+        run_stage('save_summary_store', lambda: save_summary_store(summary, signature, output_folder), summary_rows, stages)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': attendance_parser.np is not None,
+        'config': {key: value for key, value in config.items() if key in PIPELINE_CONFIG and key not in ('output', 'compare')},
+        'rows': stats,
+        'stages': stages
+    }
+
+
+def compress_logs(source: str, folder: str, variant: str) -> None:
+    os.makedirs(folder)
+    files = sorted(os.listdir(source))
+    if variant == 'zip':
+        with zipfile.ZipFile(os.path.join(folder, 'logs.zip'), 'w', zipfile.ZIP_DEFLATED) as archive:
+            for file in files:
+                archive.write(os.path.join(source, file), file)
+    elif variant == 'tar.gz':
+        with tarfile.open(os.path.join(folder, 'logs.tar.gz'), 'w:gz') as archive:
+            for file in files:
+                archive.add(os.path.join(source, file), file)
+    else:
+        opener = {'gz': gzip.open, 'bz2': bz2.open, 'xz': lzma.open, 'zst': attendance_parser.COMPRESSED_OPENERS['.zst']}[variant]
+        for file in files:
+            with open(os.path.join(source, file), 'rb') as src, opener(os.path.join(folder, f'{file}.{variant}'), 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+
+
+def benchmark_compression(config: Dict) -> None:
+    #read_log_files on the same logs stored plain, compressed and archived
+    workdir = tempfile.mkdtemp(prefix='attendance_bench_')
+    try:
+        plain_folder = os.path.join(workdir, 'plain')
+        stats = generate_logs(plain_folder, config)
+        variants = ['plain', 'gz', 'bz2', 'xz'] + (['zst'] if attendance_parser.zstd else []) + ['zip', 'tar.gz']
+        print(f"\nread_log_files on {stats['rows']} rows in {config['files']} files")
+        print(f"{'Input':<10}{'Size':>12}{'Time':>11}{'Rows/s':>12}{'vs plain':>10}")
+
+        plain_seconds = None
+        for variant in variants:
+            folder = plain_folder if variant == 'plain' else os.path.join(workdir, variant)
+            if variant != 'plain':
+                compress_logs(plain_folder, folder, variant)
+            size = sum(os.path.getsize(os.path.join(folder, file)) for file in os.listdir(folder))
+
+            error_log = ErrorLog()
+            with redirect_stdout(io.StringIO()):
+                started = timer.perf_counter()
+                read_log_files(folder, config['workers'], error_log)
+                seconds = timer.perf_counter() - started
+            plain_seconds = plain_seconds or seconds
+            print(f"{variant:<10}{size / 1024 / 1024:>9.1f} MB{seconds:>10.3f}s{stats['rows'] / seconds:>12.0f}{seconds / plain_seconds:>9.2f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def benchmark_overlap(config: Dict) -> None:
+    #The whole report run with stages one after another and with --pipeline
+    workdir = tempfile.mkdtemp(prefix='attendance_bench_')
+    cwd = os.getcwd()
+    try:
+        stats = generate_logs(os.path.join(workdir, LOG_FOLDER), config)
+        os.chdir(workdir)
+        print(f"\nReport run on {stats['rows']} rows in {config['files']} files")
+        print(f"{'Mode':<12}{'Read':>10}{'Writers':>11}{'Total':>11}")
+
+        #An untimed run first, so neither mode pays for the cold page cache
+        with redirect_stdout(io.StringIO()):
+            run_pipeline(parse_options([])[0], None, PipelineMetrics())
+
+        for mode, args in [('sequential', []), ('pipelined', ['--pipeline'])]:
+            options = parse_options(args)[0]
+            metrics = PipelineMetrics()
+            with redirect_stdout(io.StringIO()):
+                started = timer.perf_counter()
+                run_pipeline(options, None, metrics)
+                seconds = timer.perf_counter() - started
+            writers = seconds - sum(metrics.stages[name]['seconds'] for name in ('read', 'summary', 'search'))
+            print(f"{mode:<12}{metrics.stages['read']['seconds']:>9.3f}s{writers:>10.3f}s{seconds:>10.3f}s")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def benchmark_startup(config: Dict, runs: int = STARTUP_RUNS) -> None:
+    #Whole-process time of a --search answered from the summary store, started as a script and as a module
+    workdir = tempfile.mkdtemp(prefix='attendance_bench_')
+    try:
+        generate_logs(os.path.join(workdir, LOG_FOLDER), config)
+        #process_attendance.py is the entry script in front of attendance_parser
+        for name in ('process_attendance.py', 'attendance_parser.py'):
+            shutil.copy(os.path.join(os.path.dirname(attendance_parser.__file__), name), workdir)
+        subprocess.run([sys.executable, 'process_attendance.py'], cwd=workdir, check=True, capture_output=True)
+
+        search = ['--search', 'employee', '10000']
+        commands = [
+            ('interpreter', [sys.executable, '-c', 'pass']),
+            ('script --no-excel', [sys.executable, 'process_attendance.py'] + search + ['--no-excel']),
+            ('python -m --no-excel', [sys.executable, '-m', 'process_attendance'] + search + ['--no-excel']),
+            ('script', [sys.executable, 'process_attendance.py'] + search)
+        ]
+        print(f"\n--search employee from a warm summary store, {runs} runs")
+        if sys.flags.dont_write_bytecode:
+            print("Bytecode caching is off (PYTHONDONTWRITEBYTECODE), so every run compiles the module.")
+        print(f"{'Command':<22}{'Median':>10}{'Min':>10}")
+        for name, command in commands:
+            subprocess.run(command, cwd=workdir, check=True, capture_output=True)
+            timings = []
+            for _ in range(runs):
+                started = timer.perf_counter()
+                subprocess.run(command, cwd=workdir, check=True, capture_output=True)
+                timings.append((timer.perf_counter() - started) * 1000)
+            print(f"{name:<22}{statistics.median(timings):>8.0f}ms{min(timings):>8.0f}ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare_results(results: Dict, previous_file: str) -> None:
+    with open(previous_file, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+    if previous.get('config') != results['config']:
+        print(f"Warning: '{previous_file}' was recorded with a different configuration.")
+
+    print(f"\n{'Stage':<22}{'Previous':>11}{'Current':>11}{'Change':>10}")
+    for name, stage in results['stages'].items():
+        before = previous.get('stages', {}).get(name)
+        if not before or not before['seconds']:
+            continue
+        change = (stage['seconds'] - before['seconds']) / before['seconds'] * 100
+        print(f"{name:<22}{before['seconds']:>10.3f}s{stage['seconds']:>10.3f}s{change:>+9.1f}%")
+
+
+def run_pipeline_benchmark(config: Dict) -> None:
+    results = benchmark_pipeline(config)
+    with open(config['output'], 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=4)
+    print(f"Results saved to '{config['output']}'.")
+    if config['compare']:
+        compare_results(results, config['compare'])
+
+
+def parse_config(args: List[str]) -> Dict:
+    config = dict(PIPELINE_CONFIG, rows=BENCHMARK_ROWS, benchmarks=[])
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg.startswith('--') and i + 1 < len(args):
+            key = arg[2:]
+            if key not in config or key == 'benchmarks':
+                raise SystemExit(f"Error: unknown option '{arg}'.")
+            default = config[key]
+            value = args[i + 1]
+            config[key] = type(default)(value) if isinstance(default, (int, float)) else value
+            i += 2
+        elif arg in BENCHMARKS:
+            config['benchmarks'].append(arg)
+            i += 1
+        else:
+            raise SystemExit(f"Error: unknown benchmark '{arg}'. Available: {', '.join(BENCHMARKS)}")
+    return config
+
+
+BENCHMARKS = {
+    'timestamps': lambda config: benchmark_timestamps(config['rows']),
+    'punch_store': lambda config: benchmark_punch_store(config['rows']),
+    'log_reader': lambda config: benchmark_log_reader(config['rows']),
+    'summary': lambda config: benchmark_summary(),
+    'lookups': lambda config: benchmark_lookups(),
+    'snapshot': lambda config: benchmark_snapshot(),
+    'dedup': lambda config: benchmark_dedup(),
+    'rollups': lambda config: benchmark_rollups(),
+    'compression': benchmark_compression,
+    'overlap': benchmark_overlap,
+    'startup': benchmark_startup,
+    'pipeline': run_pipeline_benchmark
+}
+
+
+if __name__ == "__main__":
+    config = parse_config(sys.argv[1:])
+    for name in config['benchmarks'] or ['pipeline']:
+        BENCHMARKS[name](config)
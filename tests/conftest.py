@@ -0,0 +1,54 @@
+import csv
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def log_rows(rng: random.Random, count: int) -> list:
+    rows = []
+    for _ in range(count):
+        emp_code = f"100{rng.randrange(10):02d}"
+        seconds = 1757030400 + rng.randrange(5 * 86400)
+        rows.append(f"{emp_code} Ann Lee {seconds} Gate  North 2")
+    return rows
+
+
+def row_counts(error_log) -> dict:
+    return {name: count for name, count in error_log.row_stats.items() if count}
+
+
+def spooled_errors(spool_path: str) -> list:
+    with open(spool_path, 'r', newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+@pytest.fixture
+def log_folder(tmp_path):
+    #Mixed .log/.csv folder with bad rows and duplicates repeated far enough apart to land in other chunks
+    rng = random.Random(7)
+    folder = tmp_path / 'attendance_logs'
+    folder.mkdir()
+
+    a_rows = log_rows(rng, 60)
+    a_lines = ['emp_code first last ts device'] + a_rows[:30] + [
+        '10001 Ann',
+        '10-01 Ann Lee 1757030400 Gate 1',
+        '10002 Ann Lee not-a-time Gate 1',
+        '',
+        '10003 Ann Lee 1757030400',
+    ] + a_rows[30:] + a_rows[5:15]
+    (folder / 'a.log').write_text('\n'.join(a_lines) + '\n', encoding='utf-8')
+
+    c_lines = log_rows(rng, 40) + a_rows[20:35] + ['10004 Bob Ray 99999999999999999999 Gate 2']
+    (folder / 'c.log').write_text('\n'.join(c_lines) + '\n', encoding='utf-8')
+
+    b_lines = ['emp_code,first_name,last_name,timestamp,device']
+    for _ in range(30):
+        b_lines.append(f"100{rng.randrange(10):02d},Cy,Dee,2025-09-0{rng.randrange(5, 10)} {rng.randrange(7, 20):02d}:{rng.randrange(60):02d}:00,Device C")
+    b_lines += ['10005,Cy,,2025-09-05 08:00:00,Device C', '10006,Cy,Dee,05/09/2025,Device C', '10007,Cy,Dee'] + b_lines[3:9]
+    (folder / 'b.csv').write_text('\n'.join(b_lines) + '\n', encoding='utf-8')
+    return folder
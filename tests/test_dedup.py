@@ -0,0 +1,33 @@
+import pytest
+
+from attendance_parser import DEDUP_ENGINES, calculate_summary, read_log_files
+
+
+def read_with(log_folder, dedup: str, workers: int):
+    attendance_data, error_log, processed_records = read_log_files(str(log_folder), workers=workers, dedup=dedup)
+    return calculate_summary(attendance_data), dict(error_log.counts), {name: count for name, count in error_log.row_stats.items() if count}, processed_records
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.parametrize('dedup', sorted(DEDUP_ENGINES))
+def test_engine_matches_set(log_folder, dedup, workers):
+    summary, error_counts, row_stats, records = read_with(log_folder, 'set', 1)
+    engine_summary, engine_error_counts, engine_row_stats, engine_records = read_with(log_folder, dedup, workers)
+    try:
+        assert row_stats['deduplicated'] > 0
+        assert engine_summary == summary
+        assert engine_error_counts == error_counts
+        assert engine_row_stats == row_stats
+        assert len(engine_records) == len(records)
+        assert all(record_id in engine_records for record_id in records)
+    finally:
+        if hasattr(engine_records, 'close'):
+            engine_records.close()
+
+
+def test_row_stats_per_read(log_folder):
+    #Each read counts its own rows; nothing carries over between calls
+    first = read_with(log_folder, 'set', 1)[2]
+    second = read_with(log_folder, 'set', 1)[2]
+    assert first == second
+    assert first['accepted'] > 0
@@ -0,0 +1,92 @@
+import os
+import random
+
+from attendance_parser import calculate_summary, read_log_files, read_log_files_incremental
+from conftest import log_rows
+
+
+def full_read(log_folder):
+    attendance_data, _, processed_records = read_log_files(str(log_folder))
+    return calculate_summary(attendance_data), processed_records
+
+
+def assert_incremental_matches(log_folder, state_folder, expected=None):
+    summary, records = expected or full_read(log_folder)
+    attendance_data, _, processed_records = read_log_files_incremental(str(log_folder), state_folder=str(state_folder))
+    assert calculate_summary(attendance_data) == summary
+    #Records loaded from the snapshot only answer len() and `in`
+    assert len(processed_records) == len(records)
+    assert all(record_id in processed_records for record_id in records)
+
+
+def append_lines(path, lines):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def test_append(log_folder, tmp_path):
+    state_folder = tmp_path / 'state'
+    rng = random.Random(11)
+    assert_incremental_matches(log_folder, state_folder)
+
+    append_lines(log_folder / 'a.log', log_rows(rng, 25))
+    append_lines(log_folder / 'b.csv', ['10003,Cy,Dee,2025-09-08 09:15:00,Device C'])
+    assert_incremental_matches(log_folder, state_folder)
+
+    #Nothing changed, the state is loaded as saved
+    assert_incremental_matches(log_folder, state_folder)
+
+
+def test_half_written_line(log_folder, tmp_path):
+    state_folder = tmp_path / 'state'
+    rng = random.Random(12)
+    assert_incremental_matches(log_folder, state_folder)
+    before = full_read(log_folder)
+
+    #A device mid-write leaves a line without its newline; it waits for the next run
+    row = log_rows(rng, 1)[0]
+    path = log_folder / 'c.log'
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(row[:12])
+    assert_incremental_matches(log_folder, state_folder, before)
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(row[12:] + '\n')
+    assert_incremental_matches(log_folder, state_folder)
+
+
+def test_truncate(log_folder, tmp_path):
+    state_folder = tmp_path / 'state'
+    rng = random.Random(13)
+    assert_incremental_matches(log_folder, state_folder)
+
+    #copytruncate rotation: the old lines are kept in another file and a.log starts over with longer content
+    path = log_folder / 'a.log'
+    old_text = path.read_text(encoding='utf-8')
+    (log_folder / 'a-archive.log').write_text(old_text, encoding='utf-8')
+    new_lines = ['emp_code first last ts device'] + log_rows(rng, 120)
+    path.write_text('\n'.join(new_lines) + '\n', encoding='utf-8')
+    assert os.path.getsize(path) > len(old_text)
+    assert_incremental_matches(log_folder, state_folder)
+
+    #Truncated below the old offset
+    path.write_text('\n'.join(new_lines[:10]) + '\n', encoding='utf-8')
+    (log_folder / 'a-archive-2.log').write_text('\n'.join(new_lines) + '\n', encoding='utf-8')
+    assert_incremental_matches(log_folder, state_folder)
+
+
+def test_replace(log_folder, tmp_path):
+    state_folder = tmp_path / 'state'
+    rng = random.Random(14)
+    assert_incremental_matches(log_folder, state_folder)
+
+    #Create-mode rotation: c.log is renamed and a longer file takes its name and a new inode
+    path = log_folder / 'c.log'
+    old_size = os.path.getsize(path)
+    os.rename(path, log_folder / 'c-1.log')
+    path.write_text('\n'.join(log_rows(rng, 80)) + '\n', encoding='utf-8')
+    assert os.path.getsize(path) > old_size
+    assert_incremental_matches(log_folder, state_folder)
+
+    append_lines(path, log_rows(rng, 10))
+    assert_incremental_matches(log_folder, state_folder)
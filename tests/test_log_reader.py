@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+import attendance_parser
+from attendance_parser import ErrorLog, PunchStore, calculate_summary, new_reader_state, process_file, process_lines, process_log_file
+from conftest import row_counts, spooled_errors
+
+
+def read_text(filepaths, error_log):
+    attendance_data, processed_records = PunchStore(), set()
+    for filepath in filepaths:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            reader = new_reader_state(f.readline().strip())
+            f.seek(0)
+            process_lines(f, reader, filepath, attendance_data, error_log, processed_records)
+    error_log.close()
+    return attendance_data, processed_records
+
+
+def read_bytes(filepaths, error_log, preloaded):
+    attendance_data, processed_records = PunchStore(), set()
+    for filepath in filepaths:
+        if preloaded:
+            with open(filepath, 'rb') as f:
+                process_file(filepath, attendance_data, error_log, processed_records, f.read())
+        else:
+            process_file(filepath, attendance_data, error_log, processed_records)
+    error_log.close()
+    return attendance_data, processed_records
+
+
+@pytest.mark.parametrize('preloaded', [False, True])
+@pytest.mark.parametrize('window_bytes', [1, 97, attendance_parser.LOG_WINDOW_BYTES])
+def test_byte_reader_matches_text_reader(log_folder, tmp_path, monkeypatch, window_bytes, preloaded):
+    monkeypatch.setattr(attendance_parser, 'LOG_WINDOW_BYTES', window_bytes)
+    filepaths = [os.path.join(str(log_folder), name) for name in ('a.log', 'c.log')]
+    assert all(process_log_file(filepath, PunchStore(), ErrorLog(), set()) for filepath in filepaths)
+
+    text_errors = ErrorLog(str(tmp_path / 'text_errors.csv'))
+    text_data, text_records = read_text(filepaths, text_errors)
+    byte_errors = ErrorLog(str(tmp_path / 'byte_errors.csv'))
+    byte_data, byte_records = read_bytes(filepaths, byte_errors, preloaded)
+
+    assert len(text_errors) > 0
+    assert calculate_summary(byte_data) == calculate_summary(text_data)
+    assert byte_records == text_records
+    assert row_counts(byte_errors) == row_counts(text_errors)
+    assert dict(byte_errors.samples) == dict(text_errors.samples)
+    assert spooled_errors(byte_errors.spool_path) == spooled_errors(text_errors.spool_path)
+
+
+def test_text_only_bytes_use_text_reader(tmp_path):
+    #Carriage returns, str-only whitespace and non-ASCII names keep the text reader's handling
+    for index, line in enumerate(['10001 Ann Lee 1757400000 Gate 1\r\n', '10001\x1cAnn Lee 1757400000 Gate 1\n', '10001 Zoë Lee 1757400000 Gate 1\n']):
+        filepath = tmp_path / f"{index}.log"
+        filepath.write_text(line, encoding='utf-8', newline='')
+        assert not process_log_file(str(filepath), PunchStore(), ErrorLog(), set())
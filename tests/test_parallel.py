@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from attendance_parser import ErrorLog, PunchStore, calculate_summary, is_log_file, process_files_parallel, read_log_files
+from conftest import row_counts, spooled_errors
+
+WORKERS = 2
+WHOLE_FILE = 1024 * 1024
+
+
+@pytest.mark.parametrize('chunk_bytes', [1, 97, WHOLE_FILE])
+def test_parallel_matches_serial(log_folder, tmp_path, chunk_bytes):
+    serial_errors = ErrorLog(str(tmp_path / 'serial_errors.csv'))
+    serial_data, serial_errors, serial_records = read_log_files(str(log_folder), workers=1, error_log=serial_errors)
+    serial_errors.close()
+
+    #Same file order as read_log_files
+    filepaths = [os.path.join(str(log_folder), name) for name in os.listdir(str(log_folder)) if is_log_file(name)]
+    parallel_data = PunchStore()
+    parallel_errors = ErrorLog(str(tmp_path / 'parallel_errors.csv'))
+    parallel_records = set()
+    process_files_parallel(filepaths, WORKERS, parallel_data, parallel_errors, parallel_records, chunk_bytes=chunk_bytes)
+    parallel_errors.close()
+
+    assert len(serial_errors) > 0
+    assert calculate_summary(parallel_data) == calculate_summary(serial_data)
+    assert parallel_records == serial_records
+    assert len(parallel_errors) == len(serial_errors)
+    assert parallel_errors.files == serial_errors.files
+    assert dict(parallel_errors.counts) == dict(serial_errors.counts)
+    assert dict(parallel_errors.samples) == dict(serial_errors.samples)
+    assert row_counts(parallel_errors) == row_counts(serial_errors)
+    assert spooled_errors(parallel_errors.spool_path) == spooled_errors(serial_errors.spool_path)